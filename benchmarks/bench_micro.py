@@ -0,0 +1,94 @@
+# backend/benchmarks/bench_micro.py
+"""
+Microbenchmarks for the per-interaction CPU work: topic extraction,
+sentiment scoring, JSON extraction from completions (single and batch) and
+cache-key hashing. Prints ops/sec and microseconds per op as JSON.
+
+main is imported with GROQ_API_KEY cleared so nothing leaves the machine;
+no database is needed.
+
+    python benchmarks/bench_micro.py --ops 20000 --output micro.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["GROQ_API_KEY"] = ""
+
+import llm_cache  # noqa: E402
+import main  # noqa: E402
+from bench_text_analytics import make_notes  # noqa: E402
+
+COMPLETIONS = [
+    # what the model usually sends back
+    '{"summary": "Discussed insulin dosing and trial data.", "topics": ["insulin", "trial"], "sentiment": "positive"}',
+    # wrapped in a code fence with prose around it
+    'Here is the result:\n```json\n{"summary": "Doctor raised safety concerns about pricing.", '
+    '"topics": ["safety", "pricing"], "sentiment": "negative"}\n```\nLet me know if you need more.',
+    # not JSON at all: falls back to the raw text
+    "The rep met the doctor and talked about formulary access; follow up next week.",
+]
+
+
+def batch_completion(size: int) -> str:
+    return json.dumps([
+        {"id": i, "summary": f"Visit {i}: discussed samples and outcomes.", "topics": ["samples", "outcomes"],
+         "sentiment": "neutral"}
+        for i in range(1, size + 1)
+    ])
+
+
+def measure(fn, items, repeat: int):
+    """Best of `repeat` passes over items; returns ops/sec and us/op."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - started)
+    return {"ops_per_sec": round(len(items) / best), "us_per_op": round(best / len(items) * 1e6, 2)}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=20000, help="operations per benchmark pass")
+    parser.add_argument("--words", type=int, default=60, help="max words per synthetic note")
+    parser.add_argument("--batch-size", type=int, default=10, help="items per batch completion")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="also write the results to this file")
+    args = parser.parse_args()
+
+    notes = make_notes(args.ops, args.words)
+    completions = [COMPLETIONS[i % len(COMPLETIONS)] for i in range(args.ops)]
+    batches = [batch_completion(args.batch_size)] * max(1, args.ops // args.batch_size)
+    prompts = [f"Mode: chat\n\nContent:\n{n}\n\nReturn only JSON as described." for n in notes]
+
+    results = {
+        "ops": args.ops,
+        "topics": measure(main.simple_extract_topics, notes, args.repeat),
+        "sentiment": measure(main.simple_sentiment, notes, args.repeat),
+        "analyze": measure(main.text_analyzer.analyze, notes, args.repeat),
+        "parse_llm_result": measure(main.parse_llm_result, completions, args.repeat),
+        "parse_llm_batch": measure(main.parse_llm_batch, batches, args.repeat),
+        "cache_key": measure(
+            lambda p: llm_cache.cache_key(main.LLM_MODEL, main.INTERACTION_SYSTEM_PROMPT, p, 0.0, 256),
+            prompts, args.repeat,
+        ),
+    }
+    results["parse_llm_batch"]["items_per_op"] = args.batch_size
+
+    out = json.dumps(results, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+
+
+if __name__ == "__main__":
+    main_cli()
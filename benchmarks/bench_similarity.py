@@ -0,0 +1,114 @@
+# backend/benchmarks/bench_similarity.py
+"""
+Build time, size on disk and query latency of the similar-interaction index
+(similarity_index.py) over synthetic notes: words drawn from a Zipf-shaped
+vocabulary, so a few words are in most notes and most words are rare.
+No database is needed; the index is written to a temporary directory.
+
+    python benchmarks/bench_similarity.py --notes 1000000 --queries 200
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import similarity_index  # noqa: E402
+from similarity_index import np  # noqa: E402
+
+
+def make_vocab(size: int, seed: int):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)})
+    rng.shuffle(words)
+    p = 1.0 / np.arange(1, len(words) + 1)
+    return words, p / p.sum()
+
+
+def make_notes(gen, vocab, p, count: int, words: int):
+    lengths = gen.integers(words // 2, words + 1, size=count)
+    drawn = gen.choice(len(vocab), size=int(lengths.sum()), p=p).tolist()
+    notes, start = [], 0
+    for n in lengths.tolist():
+        notes.append([vocab[i] for i in drawn[start:start + n]])
+        start += n
+    return notes
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=200000)
+    parser.add_argument("--words", type=int, default=40, help="max words per note")
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--hcps", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=50000)
+    parser.add_argument("--tail", type=int, default=5000, help="notes appended after compaction (unmerged tail)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="also write the results to this file")
+    args = parser.parse_args()
+    if not similarity_index.available:
+        raise SystemExit("ERROR: numpy is required")
+
+    vocab, p = make_vocab(args.vocab, seed=3)
+    gen = np.random.default_rng(7)
+    path = tempfile.mkdtemp(prefix="similarity-bench-")
+    index = similarity_index.SimilarityIndex(path, tail_max_rows=args.notes + args.tail + 1)
+    try:
+        def batches(start, count):
+            for lo in range(start, start + count, args.batch):
+                docs = range(lo, min(start + count, lo + args.batch))
+                notes = make_notes(gen, vocab, p, len(docs), args.words)
+                hcps = gen.integers(1, args.hcps + 1, size=len(docs)).tolist()
+                rows = [(doc, hcp, float(doc), note) for doc, hcp, note in zip(docs, hcps, notes)]
+                index.update(lambda cursor, stamp: (rows, cursor), compact=False)
+
+        started = time.perf_counter()
+        batches(1, args.notes)
+        appended = time.perf_counter() - started
+        index.compact()
+        built = time.perf_counter() - started
+        batches(args.notes + 1, args.tail)
+
+        queries = make_notes(gen, vocab, p, args.queries, args.words)
+        index.query(queries[0], k=args.k)  # page in
+        timings = {}
+        for scope in ("all", "hcp"):
+            latencies = []
+            for q in queries:
+                hcp = int(gen.integers(1, args.hcps + 1)) if scope == "hcp" else None
+                t = time.perf_counter()
+                index.query(q, k=args.k, hcp_id=hcp)
+                latencies.append((time.perf_counter() - t) * 1000)
+            timings[scope] = {"p50_ms": round(percentile(latencies, 50), 2), "p95_ms": round(percentile(latencies, 95), 2)}
+
+        stats = index.stats()
+        out = json.dumps({
+            "notes": args.notes + args.tail,
+            "append_notes_per_sec": round(args.notes / appended),
+            "build_seconds": round(built, 1),
+            "index_mb": round(stats["bytes"] / 1e6, 1),
+            "tail_rows": stats["tail_rows"],
+            "query": timings,
+        }, indent=2)
+        print(out)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(out + "\n")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
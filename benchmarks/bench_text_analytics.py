@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_text_analytics.py
+"""
+Docs/sec of the compiled text analytics engine against the original
+per-call helpers (simple_extract_topics + simple_sentiment as they were
+before text_analytics.py).
+
+    python benchmarks/bench_text_analytics.py --docs 20000
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_analytics import TextAnalyzer  # noqa: E402
+
+# -------------------------
+# Original implementations, kept verbatim as the baseline
+# -------------------------
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "in", "on", "with", "to", "for", "is", "was", "were", "it", "that", "this"
+}
+
+def legacy_extract_topics(text: str, max_topics: int = 6):
+    if not text:
+        return []
+    words = re.findall(r"\b[^\d\W]{3,}\b", text.lower())  # words >=3 letters
+    filtered = [w for w in words if w not in STOPWORDS]
+    seen = set()
+    topics = []
+    for w in filtered:
+        if w in seen:
+            continue
+        seen.add(w)
+        topics.append(w)
+        if len(topics) >= max_topics:
+            break
+    return topics
+
+def legacy_sentiment(text: str):
+    if not text:
+        return "neutral"
+    text_l = text.lower()
+    positive = ["good", "great", "positive", "promising", "interested", "approve", "yes", "will"]
+    negative = ["bad", "negative", "declined", "not", "no", "concern", "concerns", "problem", "refused"]
+    score = 0
+    for p in positive:
+        if p in text_l:
+            score += 1
+    for n in negative:
+        if n in text_l:
+            score -= 1
+    if score > 0:
+        return "positive"
+    if score < 0:
+        return "negative"
+    return "neutral"
+
+# -------------------------
+# Synthetic rep notes
+# -------------------------
+VOCAB = (
+    "met doctor discussed diabetes insulin dosage trial results brochure samples pricing formulary "
+    "cardiology follow up next week patient outcomes efficacy safety profile interested promising "
+    "concerns declined not sure will review great positive negative problem refused approve know "
+    "willing nothing another clinic hospital nurse schedule call email data summary"
+).split()
+
+
+def make_notes(n: int, words: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(VOCAB) for _ in range(rng.randint(words // 2, words))) + "." for _ in range(n)]
+
+
+def rate(fn, notes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(notes)
+        best = min(best, time.perf_counter() - started)
+    return len(notes) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=60, help="max words per note")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    notes = make_notes(args.docs, args.words)
+    analyzer = TextAnalyzer()
+
+    def legacy(batch):
+        return [(legacy_extract_topics(t), legacy_sentiment(t)) for t in batch]
+
+    def per_call(batch):
+        return [analyzer.analyze(t) for t in batch]
+
+    results = {
+        "docs": args.docs,
+        "legacy_docs_per_sec": round(rate(legacy, notes, args.repeat)),
+        "analyze_docs_per_sec": round(rate(per_call, notes, args.repeat)),
+        "analyze_batch_docs_per_sec": round(rate(analyzer.analyze_batch, notes, args.repeat)),
+    }
+    results["speedup_batch_vs_legacy"] = round(results["analyze_batch_docs_per_sec"] / results["legacy_docs_per_sec"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# backend/benchmarks/load_test.py
+"""
+End-to-end load test: API (uvicorn) + queue worker + stub Groq.
+
+Starts the stub Groq server in-process, then the API and worker.py as
+subprocesses pointed at it (GROQ_API_URL), and drives three scenarios with
+concurrent clients:
+
+    create_process_fetch  POST an interaction, wait until the worker has
+                          processed it, GET it (end-to-end latency)
+    list                  GET /v1/interactions, following X-Next-Cursor
+    trend_summary         POST /v1/hcps/{id}/trend_summary
+
+Reports throughput and p50/p95/p99 latency per scenario, the time the
+queue needed to drain after the last create, and the stub's request/error
+counts, as JSON. Uses a fresh SQLite file unless --database-url is given
+(e.g. a scratch Postgres database); manage.py migrate runs first.
+
+    python benchmarks/load_test.py --interactions 500 --concurrency 16 --latency-ms 300 --error-rate 0.02
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_groq import add_stub_arguments, config_from_args, start_stub, stub_url  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+NOTES = [
+    "Met Dr. {n} to discuss insulin dosing; interested in the new trial results and asked for samples.",
+    "Follow-up with Dr. {n} on formulary access. Some concerns about pricing, will review next week.",
+    "Dr. {n} declined the brochure, not convinced by the efficacy data. Schedule another call.",
+    "Lunch meeting with Dr. {n} and the nurse team on patient outcomes and the safety profile.",
+]
+
+
+def percentile(sorted_values, pct: float):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class Recorder:
+    """Latencies (ms) and error count for one scenario."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.started = None
+        self.finished = None
+
+    def add(self, ms: float = None, error: bool = False):
+        with self.lock:
+            if error:
+                self.errors += 1
+            else:
+                self.latencies.append(ms)
+
+    def summary(self):
+        lat = sorted(self.latencies)
+        elapsed = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        return {
+            "requests": len(lat) + self.errors,
+            "errors": self.errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput_per_sec": round(len(lat) / elapsed, 2) if elapsed > 0 else None,
+            "p50_ms": _round(percentile(lat, 50)),
+            "p95_ms": _round(percentile(lat, 95)),
+            "p99_ms": _round(percentile(lat, 99)),
+            "max_ms": _round(lat[-1] if lat else None),
+        }
+
+
+def _round(v):
+    return round(v, 1) if v is not None else None
+
+
+def run_scenario(fn, count: int, concurrency: int) -> Recorder:
+    rec = Recorder()
+    local = threading.local()
+
+    def task(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        try:
+            fn(session, i, rec)
+        except Exception as e:
+            print("request failed:", str(e))
+            rec.add(error=True)
+
+    rec.started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(task, range(count)))
+    rec.finished = time.perf_counter()
+    return rec
+
+
+def wait_for(url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"timed out waiting for {url}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to a fresh SQLite file")
+    parser.add_argument("--api-port", type=int, default=8765)
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--db-mode", choices=("sync", "async"), default=os.getenv("DB_MODE", "sync"),
+                        help="DB_MODE for the API (the worker is always sync)")
+    parser.add_argument("--worker-processes", type=int, default=1)
+    parser.add_argument("--worker-threads", type=int, default=4)
+    parser.add_argument("--worker-poll-interval", type=float, default=0.2)
+    parser.add_argument("--groq-rpm", type=float, default=6000,
+                        help="client-side GROQ_RPM; the production default (30) dominates any measurement")
+    parser.add_argument("--groq-tpm", type=float, default=10_000_000, help="client-side GROQ_TPM")
+    parser.add_argument("--llm-batch-size", type=int, default=0, help="LLM_BATCH_SIZE for the worker")
+    parser.add_argument("--hcps", type=int, default=20)
+    parser.add_argument("--interactions", type=int, default=200)
+    parser.add_argument("--reads", type=int, default=500, help="requests for each read scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--process-timeout", type=float, default=60.0,
+                        help="max seconds to wait for one interaction to be processed")
+    parser.add_argument("--output", help="also write the results to this file")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub_config = config_from_args(args)
+    stub = start_stub(stub_config)
+    database_url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "load_test.db")
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        DB_MODE=args.db_mode,
+        GROQ_API_URL=stub_url(stub),
+        GROQ_API_KEY="stub",
+        GROQ_RPM=str(args.groq_rpm),
+        GROQ_TPM=str(args.groq_tpm),
+        LLM_BATCH_SIZE=str(args.llm_batch_size),
+        WORKER_POLL_INTERVAL=str(args.worker_poll_interval),
+    )
+    base = f"http://127.0.0.1:{args.api_port}"
+
+    subprocess.run([sys.executable, "manage.py", "migrate"], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+    procs = [subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.api_port),
+         "--workers", str(args.api_workers), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )]
+    try:
+        wait_for(f"{base}/v1/health", timeout=30)
+        procs.append(subprocess.Popen(
+            [sys.executable, "worker.py", "--processes", str(args.worker_processes),
+             "--threads", str(args.worker_threads)],
+            cwd=ROOT, env=env,
+        ))
+
+        http = requests.Session()
+        hcp_ids = [
+            http.post(f"{base}/v1/hcps", json={"name": f"Dr. Load {n}", "speciality": "Cardiology"}).json()["id"]
+            for n in range(args.hcps)
+        ]
+        last_create = [0.0]
+
+        def create_process_fetch(s, i, rec):
+            started = time.perf_counter()
+            r = s.post(f"{base}/v1/interactions", json={
+                "hcp_id": hcp_ids[i % len(hcp_ids)],
+                "rep_id": f"rep-{i % 10}",
+                "mode": "chat",
+                "raw_text": NOTES[i % len(NOTES)].format(n=i),
+            })
+            r.raise_for_status()
+            last_create[0] = max(last_create[0], time.perf_counter())
+            interaction_id = r.json()["id"]
+            deadline = time.monotonic() + args.process_timeout
+            while True:
+                r = s.get(f"{base}/v1/interactions/{interaction_id}")
+                r.raise_for_status()
+                if r.json().get("status") == "processed":
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"interaction {interaction_id} not processed")
+                time.sleep(0.05)
+            rec.add((time.perf_counter() - started) * 1000)
+
+        def list_page(s, i, rec):
+            params = {"limit": 50}
+            started = time.perf_counter()
+            r = s.get(f"{base}/v1/interactions", params=params)
+            r.raise_for_status()
+            cursor = r.headers.get("X-Next-Cursor")
+            if cursor and i % 2:
+                r = s.get(f"{base}/v1/interactions", params={**params, "cursor": cursor})
+                r.raise_for_status()
+            rec.add((time.perf_counter() - started) * 1000)
+
+        def trend(s, i, rec):
+            started = time.perf_counter()
+            r = s.post(f"{base}/v1/hcps/{hcp_ids[i % len(hcp_ids)]}/trend_summary")
+            r.raise_for_status()
+            rec.add((time.perf_counter() - started) * 1000)
+
+        e2e = run_scenario(create_process_fetch, args.interactions, args.concurrency)
+
+        # every client waited for its own row; this catches retries still in flight
+        drain_started = last_create[0]
+        while True:
+            stats = http.get(f"{base}/v1/queue/stats").json()
+            if stats["queued"] == 0 and stats["running"] == 0:
+                break
+            time.sleep(0.1)
+        drain_seconds = time.perf_counter() - drain_started
+
+        results = {
+            "database": database_url.split("://", 1)[0],
+            "config": {k: v for k, v in vars(args).items() if k not in ("output", "database_url")},
+            "scenarios": {
+                "create_process_fetch": e2e.summary(),
+                "list": run_scenario(list_page, args.reads, args.concurrency).summary(),
+                "trend_summary": run_scenario(trend, args.reads, args.concurrency).summary(),
+            },
+            "queue_drain_seconds": round(drain_seconds, 3),
+            "queue": stats,
+            "stub": dict(stub_config.counts),
+        }
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+        stub.shutdown()
+
+    out = json.dumps(results, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# backend/benchmarks/stub_groq.py
+"""
+Local stand-in for the Groq chat-completions endpoint.
+
+Answers OpenAI-style requests with a deterministic JSON result derived from
+the prompt (an array for batched prompts), after a configurable latency.
+Can inject 5xx errors and 429s, either at random or by enforcing a
+requests-per-minute quota, to exercise retries and rate limiting.
+
+Requests with "stream": true get OpenAI-style SSE chunks (a few characters
+each, usage in x_groq on the last one, then [DONE]): the first arrives after
+--first-token-ms and the rest are spread over the remaining latency, so a
+streamed and a non-streamed request take equally long overall.
+
+--model-latency gemma2-9b-it=2000 gives one model its own mean latency, to
+exercise the model router (llm_routing.py).
+
+    python benchmarks/stub_groq.py --port 8099 --latency-ms 300 --error-rate 0.02 --rpm 600
+    GROQ_API_URL=http://127.0.0.1:8099/openai/v1/chat/completions GROQ_API_KEY=stub python worker.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 200.0, jitter_ms: float = 50.0, error_rate: float = 0.0,
+                 rate_429: float = 0.0, rpm: int = 0, retry_after: float = 1.0, seed: int = 0,
+                 first_token_ms: float = 50.0, chunk_chars: int = 4, model_latency_ms: Optional[Dict[str, float]] = None):
+        self.latency_ms = latency_ms
+        self.model_latency_ms = dict(model_latency_ms or {})
+        self.first_token_ms = first_token_ms
+        self.chunk_chars = chunk_chars
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.rpm = rpm
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent = deque()  # request timestamps within the last minute
+        self.counts = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0}
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+
+def _words(text: str):
+    return re.findall(r"[a-z]{4,}", (text or "").lower())
+
+
+def _result_for(content: str, item_id=None):
+    words = _words(content)
+    result = {
+        "summary": (content or "No notes provided.").strip()[:120],
+        "topics": list(dict.fromkeys(words))[:3],
+        "sentiment": "positive" if "interested" in words else "neutral",
+    }
+    if item_id is not None:
+        result = {"id": item_id, **result}
+    return result
+
+
+def completion_text(body: dict) -> str:
+    """Assistant text for a request: one JSON object, or an array for batch prompts."""
+    messages = body.get("messages") or []
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = next((m.get("content") or "" for m in messages if m.get("role") == "user"), "")
+    if "JSON array" in system:
+        try:
+            items = json.loads(user)
+        except ValueError:
+            items = []
+        return json.dumps([_result_for(i.get("content"), i.get("id")) for i in items if isinstance(i, dict)])
+    content = user.split("Content:\n", 1)[-1].split("\n\nReturn only JSON", 1)[0]
+    return json.dumps(_result_for(content))
+
+
+def make_handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, payload: dict, headers: dict = None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _write_chunk(self, data: bytes):
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def _stream(self, body: dict, text: str, usage: dict, delay: float):
+            """Chunked text/event-stream response; total time ~ delay, like the non-streamed reply."""
+            first = min(delay, config.first_token_ms / 1000.0)
+            pieces = [text[i:i + config.chunk_chars] for i in range(0, len(text), config.chunk_chars)] or [""]
+            gap = (delay - first) / len(pieces)
+            base = {"id": f"stub-{time.time_ns()}", "object": "chat.completion.chunk", "model": body.get("model")}
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(first)
+            for n, piece in enumerate(pieces):
+                last = n == len(pieces) - 1
+                chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece},
+                                              "finish_reason": "stop" if last else None}]}
+                if last:
+                    chunk["x_groq"] = {"usage": usage}
+                self._write_chunk(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+                if not last:
+                    time.sleep(gap)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with config.lock:
+                    self._send(200, dict(config.counts))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, {"error": {"message": "invalid json"}})
+                return
+            config.count("requests")
+
+            now = time.monotonic()
+            with config.lock:
+                limited = config.rng.random() < config.rate_429
+                if config.rpm:
+                    while config.recent and now - config.recent[0] > 60:
+                        config.recent.popleft()
+                    if len(config.recent) >= config.rpm:
+                        limited = True
+                    else:
+                        config.recent.append(now)
+                failed = config.rng.random() < config.error_rate
+                mean = config.model_latency_ms.get(body.get("model"), config.latency_ms)
+                delay = max(0.0, config.rng.gauss(mean, config.jitter_ms)) / 1000.0
+
+            if limited:
+                config.count("rate_limited")
+                self._send(429, {"error": {"message": "rate limit exceeded"}},
+                           {"retry-after": str(config.retry_after)})
+                return
+            if failed:
+                time.sleep(delay)
+                config.count("errors")
+                self._send(503, {"error": {"message": "injected failure"}})
+                return
+
+            text = completion_text(body)
+            prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages") or []) // 4
+            completion_tokens = len(text) // 4
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+            config.count("ok")
+            if body.get("stream"):
+                self._stream(body, text, usage, delay)
+                return
+            time.sleep(delay)
+            self._send(200, {
+                "id": f"stub-{time.time_ns()}",
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+    return Handler
+
+
+def start_stub(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve in a daemon thread; the bound port is server.server_address[1]."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-groq", daemon=True).start()
+    return server
+
+
+def stub_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/openai/v1/chat/completions"
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="mean stub response latency")
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rpm", type=int, default=0, help="enforce a requests-per-minute quota (0 = off)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+    parser.add_argument("--first-token-ms", type=float, default=50.0, help="time to the first chunk of a streamed reply")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=MS",
+                        help="mean latency for one model (repeatable)")
+
+
+def config_from_args(args) -> StubConfig:
+    return StubConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                      rate_429=args.rate_429, rpm=args.rpm, retry_after=args.retry_after,
+                      first_token_ms=args.first_token_ms,
+                      model_latency_ms={m: float(ms) for m, _, ms in (v.partition("=") for v in args.model_latency)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    server = start_stub(config_from_args(args), args.host, args.port)
+    print(f"stub Groq listening on {stub_url(server)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# backend/db_replicas.py
+"""
+Read-replica routing for the read-only endpoints.
+
+A ReplicaSet holds one engine per replica URL, plus an async engine in
+DB_MODE=async. Each read-only request takes the next healthy replica in
+round-robin order and reads from the primary when none is healthy. A daemon
+thread pings every replica (SELECT 1) every check_interval seconds. A
+replica whose connection fails at checkout is marked down at once, so the
+failing request falls back to the primary instead of erroring. The next
+successful ping brings the replica back.
+
+Read-your-writes: replicas lag the primary. StickyWritesMiddleware sets a
+short-lived cookie on every successful write request, and a client that
+sends it back reads from the primary until it expires (sticky_seconds). A
+rep therefore sees their own create or edit on the next fetch, whichever
+API process serves it.
+
+    replicas = ReplicaSet([Replica("replica-0", engine)], sticky_seconds=5)
+    replicas.start()
+    replica = replicas.pick(request.cookies.get(STICKY_COOKIE))  # None: read from the primary
+"""
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+import metrics
+
+logger = logging.getLogger("db_replicas")
+
+STICKY_COOKIE = "crm_primary_until"  # unix time until which this client reads from the primary
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Replica:
+    def __init__(self, name: str, engine, async_engine=None):
+        self.name = name  # label for logs and metrics; URLs may carry passwords
+        self.engine = engine
+        self.async_engine = async_engine
+        self.healthy = True
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+
+def sticky(cookie: Optional[str], now: Optional[float] = None) -> bool:
+    """True while a STICKY_COOKIE value has not expired."""
+    try:
+        return float(cookie) > (now if now is not None else time.time())
+    except (TypeError, ValueError):
+        return False
+
+
+class ReplicaSet:
+    def __init__(self, replicas: Iterable[Replica], check_interval: float = 5.0, sticky_seconds: float = 5.0):
+        self.replicas: List[Replica] = list(replicas)
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self._counter = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for replica in self.replicas:
+            metrics.DB_REPLICA_UP.set(1, replica=replica.name)
+
+    def pick(self, cookie: Optional[str] = None) -> Optional[Replica]:
+        """The next healthy replica, or None when the caller should read from the primary."""
+        if sticky(cookie):
+            return None
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._counter) % len(healthy)]
+
+    def mark_down(self, replica: Replica, error: BaseException):
+        if replica.healthy:
+            logger.warning("read replica %s is down: %s", replica.name, error)
+        replica.healthy = False
+        replica.last_error = str(error)[:200]
+        metrics.DB_REPLICA_UP.set(0, replica=replica.name)
+
+    def check(self):
+        """Ping every replica once and update its health."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+            except Exception as e:
+                self.mark_down(replica, e)
+            else:
+                if not replica.healthy:
+                    logger.info("read replica %s is back", replica.name)
+                replica.healthy = True
+                replica.last_error = None
+                metrics.DB_REPLICA_UP.set(1, replica=replica.name)
+            replica.checked_at = time.time()
+
+    def _run(self):
+        while True:
+            self.check()
+            if self._stop.wait(self.check_interval):
+                return
+
+    def start(self):
+        """Start the health-check thread (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": r.name, "healthy": r.healthy, "last_error": r.last_error, "checked_at": r.checked_at}
+            for r in self.replicas
+        ]
+
+
+class StickyWritesMiddleware:
+    """
+    Pure ASGI middleware: responses below 400 to write methods set
+    STICKY_COOKIE for sticky_seconds. Routes in read_only (path templates,
+    e.g. a POST that only reads) are left alone.
+    """
+
+    def __init__(self, app, sticky_seconds: float, read_only: Iterable[str] = ()):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+        self.read_only = set(read_only)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                route = getattr(scope.get("route"), "path", None)
+                if route not in self.read_only:
+                    until = time.time() + self.sticky_seconds
+                    cookie = (f"{STICKY_COOKIE}={until:.3f}; Max-Age={math.ceil(self.sticky_seconds)}; "
+                              f"Path=/; HttpOnly; SameSite=Lax")
+                    message = dict(message, headers=list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())])
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
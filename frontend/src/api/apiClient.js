@@ -3,6 +3,8 @@ const API_BASE = process.env.REACT_APP_API_BASE || "http://localhost:8000";
 async function request(path, opts = {}) {
   const res = await fetch(`${API_BASE}${path}`, {
     headers: { "Content-Type": "application/json" },
+    // the read-your-writes cookie keeps our own reads on the primary right after a write
+    credentials: "include",
     ...opts
   });
   if (!res.ok) {
@@ -12,8 +14,17 @@ async function request(path, opts = {}) {
   return res.json();
 }
 
-export async function listHcps() {
-  return request("/v1/hcps");
+// One page of the roster, by name; pass the previous page's X-Next-Cursor to continue.
+export async function listHcps(limit = 500, cursor = null) {
+  const q = new URLSearchParams({ limit: String(limit) });
+  if (cursor) q.set("cursor", cursor);
+  return request(`/v1/hcps?${q}`);
+}
+
+// Typeahead: top matches for what has been typed so far.
+export async function searchHcps(prefix, limit = 10) {
+  const q = new URLSearchParams({ prefix, limit: String(limit) });
+  return request(`/v1/hcps/search?${q}`);
 }
 
 export async function createHcp(payload) {
@@ -40,3 +51,57 @@ export async function editInteraction(id, updates) {
 export async function processInteractionNow(id) {
   return request(`/v1/interactions/${id}/process`, { method: "POST" });
 }
+
+// Server-Sent Events: current state, then each status change until processed.
+// Returns a function that closes the stream.
+export function subscribeInteraction(id, onEvent) {
+  const source = new EventSource(`${API_BASE}/v1/interactions/${id}/events`);
+  source.onmessage = (e) => {
+    try {
+      onEvent(JSON.parse(e.data));
+    } catch (err) {
+      // ignore malformed frames
+    }
+  };
+  return () => source.close();
+}
+
+// Process now with a streamed LLM completion. EventSource cannot POST, so the
+// text/event-stream body is read with fetch: partial summary/topics arrive with
+// status "streaming", then the processed interaction.
+// Returns a function that aborts the stream.
+export function streamProcessInteraction(id, onEvent, onError) {
+  const controller = new AbortController();
+  (async () => {
+    const res = await fetch(`${API_BASE}/v1/interactions/${id}/process/stream`, {
+      method: "POST",
+      credentials: "include",
+      signal: controller.signal,
+    });
+    if (!res.ok) throw new Error(`${res.status} ${res.statusText}`);
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buf += decoder.decode(value, { stream: true });
+      let sep;
+      while ((sep = buf.indexOf("\n\n")) >= 0) {
+        const frame = buf.slice(0, sep);
+        buf = buf.slice(sep + 2);
+        for (const line of frame.split("\n")) {
+          if (!line.startsWith("data: ")) continue;
+          try {
+            onEvent(JSON.parse(line.slice(6)));
+          } catch (err) {
+            // ignore malformed frames
+          }
+        }
+      }
+    }
+  })().catch((err) => {
+    if (err.name !== "AbortError" && onError) onError(err);
+  });
+  return () => controller.abort();
+}
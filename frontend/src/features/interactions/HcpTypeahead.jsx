@@ -0,0 +1,84 @@
+// frontend/src/features/interactions/HcpTypeahead.jsx
+import React, { useEffect, useRef, useState } from "react";
+import * as api from "../../api/apiClient";
+
+const MIN_CHARS = 2;
+const DEBOUNCE_MS = 150;
+
+function label(h) {
+  return h.speciality ? `${h.name} (${h.speciality})` : h.name;
+}
+
+// Text box that suggests HCPs from GET /v1/hcps/search as the user types,
+// instead of loading the whole roster into a dropdown.
+export default function HcpTypeahead({ onSelect }) {
+  const [text, setText] = useState("");
+  const [matches, setMatches] = useState([]);
+  const [open, setOpen] = useState(false);
+  // id of the latest request; older replies that arrive late are dropped
+  const latest = useRef(0);
+
+  useEffect(() => {
+    const prefix = text.trim();
+    const seq = ++latest.current;
+    if (prefix.length < MIN_CHARS) {
+      setMatches([]);
+      return undefined;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const rows = await api.searchHcps(prefix);
+        if (seq === latest.current) setMatches(rows);
+      } catch (err) {
+        if (seq === latest.current) setMatches([]);
+      }
+    }, DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [text]);
+
+  function choose(h) {
+    setText(label(h));
+    setOpen(false);
+    onSelect(h);
+  }
+
+  return (
+    <span style={{ position: "relative", display: "inline-block" }}>
+      <input
+        value={text}
+        placeholder="Name, organisation or speciality"
+        onChange={(e) => {
+          setText(e.target.value);
+          setOpen(true);
+          onSelect(null);
+        }}
+        onFocus={() => setOpen(true)}
+        onBlur={() => setOpen(false)}
+        style={{ width: 320 }}
+      />
+      {open && matches.length > 0 && (
+        <ul
+          style={{
+            position: "absolute", zIndex: 1, left: 0, right: 0, margin: 0, padding: 0,
+            listStyle: "none", background: "#fff", border: "1px solid #ccc",
+          }}
+        >
+          {matches.map((h) => (
+            // onMouseDown fires before the input's blur closes the list
+            <li
+              key={h.id}
+              onMouseDown={(e) => {
+                e.preventDefault();
+                choose(h);
+              }}
+              style={{ padding: "4px 8px", cursor: "pointer" }}
+            >
+              {label(h)}
+              {h.organisation && <span style={{ color: "#666" }}> · {h.organisation}</span>}
+            </li>
+          ))}
+        </ul>
+      )}
+    </span>
+  );
+}
@@ -1,14 +1,14 @@
 // frontend/src/features/interactions/LogInteractionScreen.jsx
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { useDispatch, useSelector } from "react-redux";
-import { fetchHcps, postInteraction } from "./interactionsSlice";
+import { postInteraction } from "./interactionsSlice";
+import HcpTypeahead from "./HcpTypeahead";
 import * as api from "../../api/apiClient";
 
 const API_BASE = process.env.REACT_APP_API_BASE || "http://localhost:8000";
 
 export default function LogInteractionScreen() {
   const dispatch = useDispatch();
-  const hcps = useSelector((s) => s.interactions.hcps);
   const lastCreated = useSelector((s) => s.interactions.lastCreated);
 
   const [mode, setMode] = useState("form");
@@ -24,9 +24,14 @@ export default function LogInteractionScreen() {
   const [loadingTrend, setLoadingTrend] = useState(false);
   const [error, setError] = useState(null);
 
+  // close function of the open status stream, if any
+  const unsubscribeRef = useRef(null);
+
   useEffect(() => {
-    dispatch(fetchHcps());
-  }, [dispatch]);
+    return () => {
+      if (unsubscribeRef.current) unsubscribeRef.current();
+    };
+  }, []);
 
   async function handleSubmit(e) {
     e.preventDefault();
@@ -44,24 +49,62 @@ export default function LogInteractionScreen() {
       const res = await dispatch(postInteraction(payload)).unwrap();
       const id = res.id;
 
-      // Poll the backend for processed result
-      const poll = setInterval(async () => {
-        try {
-          const inter = await api.getInteraction(id);
-          if (inter && inter.status === "processed") {
-            setFetchedInteraction(inter);
-            clearInterval(poll);
+      if (unsubscribeRef.current) unsubscribeRef.current();
+
+      // Chat notes: process right away and show the summary as it streams in
+      if (mode === "chat") {
+        unsubscribeRef.current = api.streamProcessInteraction(
+          id,
+          (event) => {
+            if (event.status === "failed") {
+              unsubscribeRef.current = null;
+              setError("Processing failed. Edit the interaction to try again.");
+              return;
+            }
+            setFetchedInteraction(event);
+            if (event.status === "processed") unsubscribeRef.current = null;
+          },
+          (err) => {
+            console.error(err);
+            waitForProcessed(id); // the job was handed back to the queue; the worker processes it
           }
-        } catch (err) {
-          // ignore network blips
-        }
-      }, 800);
+        );
+        return;
+      }
+      waitForProcessed(id);
     } catch (err) {
       setError("Failed to save interaction. See console for details.");
       console.error(err);
     }
   }
 
+  // Wait for the processed result pushed by the backend
+  function waitForProcessed(id) {
+    const unsubscribe = api.subscribeInteraction(id, async (event) => {
+      if (event.status === "failed") {
+        // the processing job gave up; the stream ends here
+        unsubscribe();
+        unsubscribeRef.current = null;
+        setError("Processing failed. Edit the interaction to try again.");
+        return;
+      }
+      if (event.status !== "processed") return;
+      unsubscribe();
+      unsubscribeRef.current = null;
+      if (event.truncated) {
+        // payload too large for the push channel; fetch the full record once
+        try {
+          setFetchedInteraction(await api.getInteraction(id));
+        } catch (err) {
+          console.error(err);
+        }
+        return;
+      }
+      setFetchedInteraction(event);
+    });
+    unsubscribeRef.current = unsubscribe;
+  }
+
   // Helper to get the interaction id for tool calls
   function currentInteractionId() {
     // prefer fetchedInteraction (processed record), fallback to lastCreated (from slice)
@@ -84,6 +127,7 @@ export default function LogInteractionScreen() {
       const resp = await fetch(`${API_BASE}/v1/interactions/${interId}/generate_followups`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
+        credentials: "include",
       });
       if (!resp.ok) throw new Error(`Status ${resp.status}`);
       const data = await resp.json();
@@ -110,6 +154,7 @@ export default function LogInteractionScreen() {
       const resp = await fetch(`${API_BASE}/v1/hcps/${hcp}/trend_summary`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
+        credentials: "include",
       });
       if (!resp.ok) throw new Error(`Status ${resp.status}`);
       const data = await resp.json();
@@ -138,14 +183,7 @@ export default function LogInteractionScreen() {
 
       <label>
         HCP:{" "}
-        <select value={hcpId} onChange={(e) => setHcpId(e.target.value)}>
-          <option value="">-- Select HCP --</option>
-          {hcps.map((h) => (
-            <option key={h.id} value={h.id}>
-              {h.name} ({h.speciality})
-            </option>
-          ))}
-        </select>
+        <HcpTypeahead onSelect={(h) => setHcpId(h ? String(h.id) : "")} />
       </label>
 
       <br /><br />
@@ -199,7 +237,7 @@ export default function LogInteractionScreen() {
               ? fetchedInteraction.topics.join(", ")
               : "None"}
           </p>
-          <p><b>Sentiment:</b> {fetchedInteraction.sentiment}</p>
+          <p><b>Sentiment:</b> {fetchedInteraction.status === "streaming" ? "…" : fetchedInteraction.sentiment}</p>
           <p><b>Interaction ID:</b> {fetchedInteraction.id}</p>
         </div>
       ) : (
@@ -1,10 +1,6 @@
 import { createSlice, createAsyncThunk } from "@reduxjs/toolkit";
 import * as api from "../../api/apiClient";
 
-export const fetchHcps = createAsyncThunk("interactions/fetchHcps", async () => {
-  return api.listHcps();
-});
-
 export const postInteraction = createAsyncThunk("interactions/postInteraction", async (payload) => {
   return api.createInteraction(payload);
 });
@@ -16,7 +12,6 @@ export const fetchInteraction = createAsyncThunk("interactions/fetchInteraction"
 const interactionsSlice = createSlice({
   name: "interactions",
   initialState: {
-    hcps: [],
     status: "idle",
     lastCreated: null,
     current: null,
@@ -33,9 +28,6 @@ const interactionsSlice = createSlice({
   },
   extraReducers: (builder) => {
     builder
-      .addCase(fetchHcps.fulfilled, (state, action) => {
-        state.hcps = action.payload;
-      })
       .addCase(postInteraction.fulfilled, (state, action) => {
         state.lastCreated = action.payload;
       })
@@ -0,0 +1,468 @@
+# backend/groq_client.py
+"""
+Shared Groq chat-completions client.
+
+One process-wide client keeps a pooled keep-alive HTTP session, limits the
+number of requests in flight and paces calls with requests-per-minute and
+tokens-per-minute buckets so bursts stay under the Groq quota instead of
+bouncing off it with 429s. The buckets live in each process, so when
+several processes call Groq with one key, set GROQ_QUOTA_PROCESSES to their
+count and each takes an equal share of the quota. Both a sync (`chat`) and
+an asyncio (`achat`) entry point are provided, plus `achat_stream` for
+stream=true completions.
+
+Configuration (env):
+    GROQ_API_KEY        API key (required to call out)
+    GROQ_API_URL        endpoint; point it at a local stub server for testing
+    GROQ_MAX_IN_FLIGHT  concurrent requests per process (default 8)
+    GROQ_RPM / GROQ_TPM request / token quota per minute, 0 disables (default 30 / 15000)
+    GROQ_QUOTA_PROCESSES  processes sharing that quota (API + worker + manage.py, default 1);
+                        each paces itself to GROQ_RPM / GROQ_TPM divided by this
+    GROQ_MAX_RETRIES    retries on 429 / 5xx / network errors (default 4)
+    GROQ_TIMEOUT        per-request timeout in seconds (default 30)
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Dict, Any, AsyncIterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+try:
+    import httpx
+except ImportError:  # async calls fall back to a worker thread
+    httpx = None
+
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GroqError(Exception):
+    """Raised when a Groq call fails after all retries."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# -------------------------
+# Rate limiting
+# -------------------------
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `per_minute` tokens/minute.
+
+    `reserve(n)` takes the tokens immediately (the balance may go negative) and
+    returns how long the caller has to wait before using them, so the same
+    bucket serves both time.sleep and asyncio.sleep callers. A per_minute of 0
+    disables the bucket.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, n: float = 1.0) -> float:
+        if self.rate <= 0:
+            return 0.0
+        n = min(n, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.paused_until - now)
+
+    def adjust(self, delta: float):
+        """Give back (positive) or charge (negative) tokens once the real cost is known."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+    def pause(self, seconds: float):
+        """Hold every caller for `seconds`, e.g. after a 429 with retry-after."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+_DURATION_RE = re.compile(r"(?:(\d+(?:\.\d+)?)h)?(?:(\d+(?:\.\d+)?)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?$")
+
+
+def _parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse retry-after style values: '3', '1.5', '7.66s', '2m59.56s', '120ms'."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    m = _DURATION_RE.match(value)
+    if not m or not any(m.groups()):
+        return None
+    h, mi, s, ms = (float(g) if g else 0.0 for g in m.groups())
+    return h * 3600 + mi * 60 + s + ms / 1000.0
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Longest wait requested by retry-after / x-ratelimit-reset-* response headers."""
+    waits = [
+        _parse_duration(headers.get(name))
+        for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    waits = [w for w in waits if w is not None]
+    return max(waits) if waits else None
+
+
+def estimate_tokens(body: Dict[str, Any]) -> int:
+    """Rough prompt + completion token estimate (~4 chars per token)."""
+    chars = sum(len(m.get("content") or "") for m in body.get("messages", []))
+    return chars // 4 + int(body.get("max_tokens") or 0)
+
+
+def extract_text(data: Dict[str, Any]) -> str:
+    """Assistant text from an OpenAI-style chat completion response."""
+    text = ""
+    try:
+        choices = data.get("choices", [])
+        if choices:
+            # handle both shape variants
+            msg = choices[0].get("message") or choices[0].get("delta") or choices[0]
+            if isinstance(msg, dict):
+                text = msg.get("content") or msg.get("text") or ""
+            else:
+                text = str(msg)
+    except Exception:
+        text = ""
+    return text
+
+
+# -------------------------
+# Client
+# -------------------------
+class GroqClient:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_url: str = GROQ_API_URL,
+        max_in_flight: int = 8,
+        requests_per_minute: float = 30,
+        tokens_per_minute: float = 15000,
+        max_retries: int = 4,
+        timeout: float = 30.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        quota_processes: int = 1,
+    ):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # this process's share of a quota that quota_processes processes draw on
+        self.quota_processes = max(1, quota_processes)
+        self.request_bucket = TokenBucket(requests_per_minute / self.quota_processes)
+        self.token_bucket = TokenBucket(tokens_per_minute / self.quota_processes)
+
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        # asyncio primitives are bound to the loop they were created on
+        self._async_lock = threading.Lock()
+        self._async_loop = None
+        self._async_client = None
+        self._async_semaphore = None
+
+    @classmethod
+    def from_env(cls) -> "GroqClient":
+        return cls(
+            api_key=os.getenv("GROQ_API_KEY"),
+            api_url=os.getenv("GROQ_API_URL", GROQ_API_URL),
+            max_in_flight=int(os.getenv("GROQ_MAX_IN_FLIGHT", "8")),
+            requests_per_minute=float(os.getenv("GROQ_RPM", "30")),
+            tokens_per_minute=float(os.getenv("GROQ_TPM", "15000")),
+            max_retries=int(os.getenv("GROQ_MAX_RETRIES", "4")),
+            timeout=float(os.getenv("GROQ_TIMEOUT", "30")),
+            quota_processes=int(os.getenv("GROQ_QUOTA_PROCESSES", "1")),
+        )
+
+    # -- helpers shared by sync and async paths --
+    def _headers(self) -> Dict[str, str]:
+        if not self.api_key:
+            raise ValueError("GROQ_API_KEY not set in environment")
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    @staticmethod
+    def _body(system_prompt, user_prompt, model, max_tokens, temperature) -> Dict[str, Any]:
+        return {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+
+    def _quota_wait(self, estimated_tokens: int) -> float:
+        wait = max(self.request_bucket.reserve(1), self.token_bucket.reserve(estimated_tokens))
+        if wait > 0:
+            metrics.GROQ_QUOTA_WAIT.inc(wait)
+        return wait
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: spreads retries from concurrent callers apart
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _settle(self, estimated_tokens: int, data: Dict[str, Any]):
+        used = (data.get("usage") or {}).get("total_tokens")
+        if isinstance(used, (int, float)):
+            self.token_bucket.adjust(estimated_tokens - used)
+
+    def _retry_delay(self, attempt: int, status: int, headers) -> float:
+        delay = retry_after_seconds(headers)
+        if status == 429:
+            delay = delay if delay is not None else self._backoff(attempt)
+            self.request_bucket.pause(delay)
+            return delay + random.uniform(0, self.backoff_base)
+        return delay if delay is not None else self._backoff(attempt)
+
+    # -- sync --
+    def chat(self, system_prompt: str, user_prompt: str, model: str = "gemma2-9b-it",
+             max_tokens: int = 512, temperature: float = 0.0) -> Dict[str, Any]:
+        """
+        Call chat completions. Returns dict with keys: raw (full response), text (assistant text).
+        Raises ValueError without an API key and GroqError once retries are exhausted.
+        """
+        headers = self._headers()
+        body = self._body(system_prompt, user_prompt, model, max_tokens, temperature)
+        estimate = estimate_tokens(body)
+
+        for attempt in range(self.max_retries + 1):
+            wait = self._quota_wait(estimate)
+            if wait > 0:
+                time.sleep(wait)
+            with self._semaphore:
+                try:
+                    resp = self._session.post(self.api_url, json=body, headers=headers, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error, delay = GroqError(f"request failed: {e}"), self._backoff(attempt)
+                else:
+                    if resp.status_code not in RETRY_STATUSES:
+                        resp.raise_for_status()
+                        data = resp.json()
+                        self._settle(estimate, data)
+                        return {"raw": data, "text": extract_text(data)}
+                    error = GroqError(f"HTTP {resp.status_code}: {resp.text[:200]}", resp.status_code)
+                    delay = self._retry_delay(attempt, resp.status_code, resp.headers)
+            if attempt < self.max_retries:
+                metrics.GROQ_RETRIES.inc(reason=error.status_code or "network")
+                time.sleep(delay)
+        raise error
+
+    # -- async --
+    def _async_primitives(self):
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            if self._async_loop is not loop:
+                self._discard_async_client()
+                self._async_loop = loop
+                self._async_semaphore = asyncio.Semaphore(self.max_in_flight)
+                self._async_client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_in_flight,
+                                        max_keepalive_connections=self.max_in_flight),
+                ) if httpx is not None else None
+            return self._async_client, self._async_semaphore
+
+    def _discard_async_client(self):
+        """
+        Close the client built for the previous event loop; its pooled
+        connections belong to that loop, so the close runs there. A loop that
+        is no longer running cannot close them; aclose() before it stops.
+        """
+        client, loop = self._async_client, self._async_loop
+        self._async_client = self._async_loop = self._async_semaphore = None
+        if client is None or client.is_closed:
+            return
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+
+    async def aclose(self):
+        """Close the async HTTP client of the running event loop (e.g. at app shutdown)."""
+        with self._async_lock:
+            if self._async_loop is not asyncio.get_running_loop():
+                return
+            client = self._async_client
+            self._async_client = self._async_loop = self._async_semaphore = None
+        if client is not None:
+            await client.aclose()
+
+    async def achat(self, system_prompt: str, user_prompt: str, model: str = "gemma2-9b-it",
+                    max_tokens: int = 512, temperature: float = 0.0) -> Dict[str, Any]:
+        """asyncio version of chat(); uses httpx when installed, else runs chat() in a thread."""
+        client, semaphore = self._async_primitives()
+        if client is None:
+            return await asyncio.to_thread(self.chat, system_prompt, user_prompt, model, max_tokens, temperature)
+
+        headers = self._headers()
+        body = self._body(system_prompt, user_prompt, model, max_tokens, temperature)
+        estimate = estimate_tokens(body)
+
+        for attempt in range(self.max_retries + 1):
+            wait = self._quota_wait(estimate)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with semaphore:
+                try:
+                    resp = await client.post(self.api_url, json=body, headers=headers)
+                except httpx.TransportError as e:
+                    error, delay = GroqError(f"request failed: {e}"), self._backoff(attempt)
+                else:
+                    if resp.status_code not in RETRY_STATUSES:
+                        resp.raise_for_status()
+                        data = resp.json()
+                        self._settle(estimate, data)
+                        return {"raw": data, "text": extract_text(data)}
+                    error = GroqError(f"HTTP {resp.status_code}: {resp.text[:200]}", resp.status_code)
+                    delay = self._retry_delay(attempt, resp.status_code, resp.headers)
+            if attempt < self.max_retries:
+                metrics.GROQ_RETRIES.inc(reason=error.status_code or "network")
+                await asyncio.sleep(delay)
+        raise error
+
+    async def achat_stream(self, system_prompt: str, user_prompt: str, model: str = "gemma2-9b-it",
+                           max_tokens: int = 512, temperature: float = 0.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streamed completion (stream=true). Yields {"delta": text} for every
+        content chunk, then one {"raw", "text"} dict shaped like chat()'s result
+        (raw carries the id, model, assembled message and usage).
+        Retries happen only before the first chunk; a stream that breaks
+        midway raises GroqError. Without httpx the whole completion arrives as one delta.
+        """
+        client, semaphore = self._async_primitives()
+        if client is None:
+            resp = await asyncio.to_thread(self.chat, system_prompt, user_prompt, model, max_tokens, temperature)
+            yield {"delta": resp["text"]}
+            yield resp
+            return
+
+        headers = self._headers()
+        body = {**self._body(system_prompt, user_prompt, model, max_tokens, temperature), "stream": True}
+        estimate = estimate_tokens(body)
+
+        for attempt in range(self.max_retries + 1):
+            wait = self._quota_wait(estimate)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            async with semaphore:
+                streaming = False
+                try:
+                    async with client.stream("POST", self.api_url, json=body, headers=headers) as resp:
+                        if resp.status_code not in RETRY_STATUSES:
+                            resp.raise_for_status()
+                            streaming = True
+                            raw: Dict[str, Any] = {"model": model}
+                            parts = []
+                            finish_reason = None
+                            async for line in resp.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                payload = line[5:].strip()
+                                if payload == "[DONE]":
+                                    break
+                                chunk = json.loads(payload)
+                                raw["id"] = chunk.get("id", raw.get("id"))
+                                raw["model"] = chunk.get("model") or raw["model"]
+                                # Groq reports usage in x_groq on the last chunk, OpenAI at the top level
+                                usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage")
+                                if usage:
+                                    raw["usage"] = usage
+                                choices = chunk.get("choices") or [{}]
+                                finish_reason = choices[0].get("finish_reason") or finish_reason
+                                delta = extract_text(chunk)
+                                if delta:
+                                    parts.append(delta)
+                                    yield {"delta": delta}
+                            text = "".join(parts)
+                            raw["choices"] = [{"index": 0, "message": {"role": "assistant", "content": text},
+                                               "finish_reason": finish_reason}]
+                            self._settle(estimate, raw)
+                            yield {"raw": raw, "text": text}
+                            return
+                        await resp.aread()
+                        error = GroqError(f"HTTP {resp.status_code}: {resp.text[:200]}", resp.status_code)
+                        delay = self._retry_delay(attempt, resp.status_code, resp.headers)
+                except (httpx.TransportError, ValueError) as e:
+                    if streaming:
+                        raise GroqError(f"stream interrupted: {e}") from e
+                    error, delay = GroqError(f"request failed: {e}"), self._backoff(attempt)
+            if attempt < self.max_retries:
+                metrics.GROQ_RETRIES.inc(reason=error.status_code or "network")
+                await asyncio.sleep(delay)
+        raise error
+
+    def close(self):
+        self._session.close()
+
+
+_client: Optional[GroqClient] = None
+_client_lock = threading.Lock()
+
+
+async def aclose_client():
+    """Release the shared client's async connections; call on the loop that used them."""
+    if _client is not None:
+        await _client.aclose()
+
+
+def get_client() -> GroqClient:
+    """Process-wide client built from the environment on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GroqClient.from_env()
+    return _client
+
+
+def call_groq_chat(system_prompt: str, user_prompt: str, model: str = "gemma2-9b-it",
+                   max_tokens: int = 512, temperature: float = 0.0) -> Dict[str, Any]:
+    return get_client().chat(system_prompt, user_prompt, model=model, max_tokens=max_tokens, temperature=temperature)
+
+
+async def acall_groq_chat(system_prompt: str, user_prompt: str, model: str = "gemma2-9b-it",
+                          max_tokens: int = 512, temperature: float = 0.0) -> Dict[str, Any]:
+    return await get_client().achat(system_prompt, user_prompt, model=model, max_tokens=max_tokens, temperature=temperature)
+
+
+def astream_groq_chat(system_prompt: str, user_prompt: str, model: str = "gemma2-9b-it",
+                      max_tokens: int = 512, temperature: float = 0.0) -> AsyncIterator[Dict[str, Any]]:
+    return get_client().achat_stream(system_prompt, user_prompt, model=model, max_tokens=max_tokens, temperature=temperature)
@@ -0,0 +1,248 @@
+# backend/hcp_roster.py
+"""
+In-process HCP roster cache with a word-prefix index for typeahead search.
+
+The roster (id, name, speciality, organisation of every HCP) is loaded once
+per process into an immutable RosterSnapshot sorted by name. Listing pages
+are slices of it (keyset cursor on (name, id)), and its version doubles as
+the ETag, so unchanged rosters are answered with 304.
+
+HCPs are only ever inserted, so (row count, highest id) identifies a roster.
+A process re-reads that pair at most every `ttl` seconds and reloads only
+when it changed; invalidate() (called after this process inserts HCPs)
+forces the check on the next request. Other processes see new HCPs within
+`ttl`.
+
+Every snapshot also carries a prefix index: each word of name, organisation
+and speciality (casefolded, accents stripped) in one sorted list, so the
+rows whose words start with a query word are one bisect range.
+
+    snap = cache.get(read_version, read_rows)
+    snap.search("smi card", limit=10)  # every query word must prefix a word of the row
+"""
+import base64
+import heapq
+import json
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_WORD_RE = re.compile(r"\w+")
+_COMBINING_RE = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+_MAX_CHAR = "\U0010ffff"
+
+# search rank of a match, by field
+FIELD_NAME, FIELD_ORGANISATION, FIELD_SPECIALITY = 0, 1, 2
+FIELDS = (FIELD_NAME, FIELD_ORGANISATION, FIELD_SPECIALITY)
+
+
+class RosterRow(NamedTuple):
+    id: int
+    name: str
+    speciality: Optional[str]
+    organisation: Optional[str]
+
+
+def normalize(value: Optional[str]) -> str:
+    """Casefolded, accent-free text ("Müller" -> "muller")."""
+    if not value:
+        return ""
+    if value.isascii():
+        return value.lower()
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFKD", value)).casefold()
+
+
+def words(value: Optional[str]) -> List[str]:
+    return _WORD_RE.findall(normalize(value))
+
+
+def encode_cursor(key: Tuple[str, int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor; raises ValueError for anything else."""
+    try:
+        name_key, hcp_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(name_key), int(hcp_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check with weak comparison (W/ prefixes ignored)."""
+    if not if_none_match:
+        return False
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == bare:
+            return True
+    return False
+
+
+class RosterSnapshot:
+    def __init__(self, rows: Iterable[Tuple[int, str, Optional[str], Optional[str]]], version: Tuple[int, int]):
+        self.version = version
+        self.etag = 'W/"hcps-{}-{}"'.format(*version)
+        keyed = sorted(((normalize(r[1]), r[0]), RosterRow(*r)) for r in rows)
+        self.rows: List[RosterRow] = [row for _, row in keyed]
+        self._keys: List[Tuple[str, int]] = [key for key, _ in keyed]
+
+        # per field, word -> row indexes; stored as one array per field with
+        # word k's rows at _postings[f][_offsets[f][k]:_offsets[f][k + 1]]
+        index: List[Dict[str, List[int]]] = [{} for _ in FIELDS]
+        shared: Dict[Optional[str], set] = {}  # organisations and specialities repeat a lot
+        for i, ((name_key, _), row) in enumerate(keyed):
+            fields = [set(_WORD_RE.findall(name_key))]
+            for value in (row.organisation, row.speciality):
+                found = shared.get(value)
+                if found is None:
+                    found = shared[value] = set(words(value))
+                fields.append(found)
+            for field, found in enumerate(fields):
+                by_word = index[field]
+                for word in found:
+                    rows_of = by_word.get(word)
+                    if rows_of is None:
+                        by_word[word] = [i]
+                    else:
+                        rows_of.append(i)
+        self._words: List[str] = sorted(set().union(*index))
+        self._offsets = []
+        self._postings = []
+        for by_word in index:
+            offsets, postings = array("q", [0]), array("q")
+            for word in self._words:
+                postings.extend(by_word.get(word, ()))
+                offsets.append(len(postings))
+            self._offsets.append(offsets)
+            self._postings.append(postings)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def page(self, limit: int, after: Optional[Tuple[str, int]] = None) -> Tuple[List[RosterRow], Optional[Tuple[str, int]]]:
+        """Up to limit rows after the cursor key, and the key to continue from (None on the last page)."""
+        start = bisect_right(self._keys, tuple(after)) if after else 0
+        end = start + limit
+        next_key = self._keys[end - 1] if end < len(self.rows) else None
+        return self.rows[start:end], next_key
+
+    def _word_range(self, word: str) -> Tuple[int, int]:
+        """Indexes into _words of the words starting with word."""
+        lo = bisect_left(self._words, word)
+        return lo, bisect_left(self._words, word + _MAX_CHAR, lo)
+
+    def _postings_count(self, word_range: Tuple[int, int]) -> int:
+        lo, hi = word_range
+        return sum(self._offsets[f][hi] - self._offsets[f][lo] for f in FIELDS)
+
+    def _field_rows(self, field: int, word_range: Tuple[int, int]) -> List[int]:
+        """Row indexes (unordered, possibly repeated) with a word in the range in this field."""
+        offsets = self._offsets[field]
+        return self._postings[field][offsets[word_range[0]]:offsets[word_range[1]]].tolist()
+
+    def search(self, prefix: str, limit: int = 10) -> List[RosterRow]:
+        """
+        Rows where every word of prefix starts some word of the name,
+        organisation or speciality. Names that start with the whole prefix
+        come first, then rows matched in the name, organisation, speciality
+        (by the query word with the fewest matches); ties in name order.
+        Work stops once limit rows are found.
+        """
+        query = set(words(prefix))
+        if not query:
+            return []
+        found: List[int] = []
+        seen = set()
+
+        # names starting with the whole prefix are contiguous in name order,
+        # and every query word then starts one of their words
+        whole = normalize(prefix).strip()
+        lo = bisect_left(self._keys, (whole,))
+        hi = bisect_left(self._keys, (whole + _MAX_CHAR,), lo)
+        for i in range(lo, min(hi, lo + limit)):
+            found.append(i)
+            seen.add(i)
+
+        ranges = {w: self._word_range(w) for w in query}
+        driver = min(ranges, key=lambda w: self._postings_count(ranges[w]))
+        # rows matching every other query word (set operations run in C)
+        allowed = None
+        for word in query - {driver}:
+            rows = set()
+            for field in FIELDS:
+                rows.update(self._field_rows(field, ranges[word]))
+            allowed = rows if allowed is None else allowed & rows
+        for field in FIELDS:
+            if len(found) >= limit:
+                break
+            # the driver's rows for this field are one contiguous slice;
+            # heapify it and pop rows in name order until limit is met
+            heap = self._field_rows(field, ranges[driver])
+            if allowed is not None:
+                heap = list(allowed.intersection(heap))
+            heapq.heapify(heap)
+            while heap and len(found) < limit:
+                i = heapq.heappop(heap)
+                if i not in seen:
+                    seen.add(i)
+                    found.append(i)
+        return [self.rows[i] for i in found]
+
+
+class RosterCache:
+    """Holds the current RosterSnapshot of one process (see module docstring)."""
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self.loads = 0
+        self._snapshot: Optional[RosterSnapshot] = None
+        self._checked_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def current(self) -> Optional[RosterSnapshot]:
+        """The snapshot if it was validated within ttl and not invalidated since, else None."""
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - self._checked_at < self.ttl:
+            return snap
+        return None
+
+    def invalidate(self):
+        """Re-check the version on the next get(); does not wait for a reload in progress."""
+        self._generation += 1
+        self._checked_at = 0.0
+
+    def get(self, read_version: Callable[[], Tuple[int, int]],
+            read_rows: Callable[[], Iterable[Tuple[int, str, Optional[str], Optional[str]]]]) -> RosterSnapshot:
+        """
+        current(), or re-check the version (one caller at a time) and reload
+        the rows if it moved. While another caller reloads, the previous
+        snapshot is returned rather than waiting for the new one.
+        """
+        snap = self.current()
+        if snap is not None:
+            return snap
+        if not self._lock.acquire(blocking=self._snapshot is None):
+            return self._snapshot
+        try:
+            snap = self.current()
+            if snap is not None:
+                return snap
+            generation = self._generation
+            # version first: a concurrent insert then shows up as a newer version next time
+            version = read_version()
+            if self._snapshot is None or self._snapshot.version != version:
+                self._snapshot = RosterSnapshot(read_rows(), version)
+                self.loads += 1
+            if generation == self._generation:
+                self._checked_at = time.monotonic()
+            return self._snapshot
+        finally:
+            self._lock.release()
@@ -0,0 +1,52 @@
+# backend/llm_archive.py
+"""
+Compression for raw LLM responses kept in the interaction_llm_raw table.
+
+Payloads are compact JSON compressed with zstd when the `zstandard` package
+is installed, else zlib. The codec is stored next to every payload, so rows
+written by either codec stay readable after the package is added or removed
+(reading a zstd row still requires zstandard).
+"""
+import json
+import threading
+import zlib
+from typing import Any, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback
+    zstandard = None
+
+CODEC = "zstd" if zstandard is not None else "zlib"
+ZSTD_LEVEL = 6
+ZLIB_LEVEL = 6
+
+# zstd (de)compressor objects are not thread-safe; keep one pair per thread
+_local = threading.local()
+
+
+def _zstd():
+    if not hasattr(_local, "c"):
+        _local.c = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        _local.d = zstandard.ZstdDecompressor()
+    return _local.c, _local.d
+
+
+def compress_json(obj: Any) -> Tuple[str, bytes, int]:
+    """(codec, compressed bytes, uncompressed size) for a JSON-serializable object."""
+    data = json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+    if CODEC == "zstd":
+        return CODEC, _zstd()[0].compress(data), len(data)
+    return CODEC, zlib.compress(data, ZLIB_LEVEL), len(data)
+
+
+def decompress_json(codec: str, payload: bytes) -> Any:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("payload is zstd-compressed; install the zstandard package to read it")
+        data = _zstd()[1].decompress(payload)
+    elif codec == "zlib":
+        data = zlib.decompress(payload)
+    else:
+        raise ValueError(f"unknown codec {codec!r}")
+    return json.loads(data)
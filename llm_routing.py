@@ -0,0 +1,408 @@
+# backend/llm_routing.py
+"""
+Circuit breakers and latency-aware model routing for LLM calls.
+
+Every configured model gets a CircuitBreaker over a rolling window of its
+recent calls. The breaker opens when the error rate or the share of slow
+calls crosses its threshold; while open, calls to that model are refused
+immediately instead of each waiting for the client timeout. After
+LLM_BREAKER_OPEN_SECONDS a few half-open probe calls are let through: if
+they succeed quickly the breaker closes, otherwise it opens again.
+
+ModelRouter picks, per call, the available model with the lowest expected
+latency (rolling p95 / success rate). Models without enough recent samples
+are tried first, in configured order, so a fresh process - or a model that
+has been idle for a whole stats window - gets re-measured. When every
+breaker is open the router raises CircuitOpenError at once and callers fall
+back to the deterministic engine.
+
+Only errors that say something about the model's health count against its
+breaker and routing stats: HTTP 5xx and 429, timeouts and connection
+errors (see counts_as_failure). A 400/401/404 or unparseable output means
+the request was bad, not the model; those calls are recorded as answered.
+
+Interactive callers can ask for a hedged call: if the first request has not
+answered after max(LLM_HEDGE_AFTER_MS, that model's p95), a backup request
+goes to the next best model (or the same one) and the first answer wins.
+
+    router = ModelRouter.from_env()
+    resp = router.call(lambda model: call_groq_chat(..., model=model), hedge=True)
+
+Configuration (env):
+    LLM_MODELS                 comma-separated models, preferred first (default gemma2-9b-it)
+    LLM_BREAKER_ERROR_RATE     error share that opens a breaker (default 0.5)
+    LLM_BREAKER_SLOW_SECONDS   a call at least this long counts as slow (default 10)
+    LLM_BREAKER_SLOW_RATE      slow-call share that opens a breaker (default 0.5)
+    LLM_BREAKER_MIN_CALLS      calls in the window before it can open (default 5)
+    LLM_BREAKER_WINDOW         breaker window in seconds (default 60)
+    LLM_BREAKER_OPEN_SECONDS   time open before half-open probes (default 30)
+    LLM_BREAKER_PROBES         successful probes needed to close (default 1)
+    LLM_ROUTING_WINDOW         routing stats window in seconds (default 300)
+    LLM_HEDGE_AFTER_MS         minimum hedge delay for interactive calls, 0 disables (default 0)
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import requests
+
+import groq_client
+import metrics
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling out while every model's breaker is open."""
+
+
+_TRANSPORT_ERRORS: Tuple[type, ...] = (TimeoutError, ConnectionError, asyncio.TimeoutError,
+                                       requests.ConnectionError, requests.Timeout)
+if groq_client.httpx is not None:
+    _TRANSPORT_ERRORS += (groq_client.httpx.TransportError,)
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    """
+    Whether a call that raised exc should count against the model: HTTP 5xx
+    or 429 (GroqError.status_code or the HTTP error's response), timeouts and
+    connection errors. A status-less GroqError is raised after retrying a
+    network error, so it counts too; client errors and anything else do not.
+    """
+    if isinstance(exc, _TRANSPORT_ERRORS):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(exc, groq_client.GroqError)
+
+
+class RollingWindow:
+    """Outcomes (time, ok, latency) of the calls in the last `seconds`, at most `max_samples`."""
+
+    def __init__(self, seconds: float, max_samples: int = 1000):
+        self.seconds = seconds
+        self._samples: deque = deque(maxlen=max_samples)
+
+    def add(self, ok: bool, latency: float, now: Optional[float] = None):
+        self._samples.append((time.monotonic() if now is None else now, ok, latency))
+
+    def _trim(self, now: float):
+        cutoff = now - self.seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def summary(self, slow_seconds: float = math.inf, now: Optional[float] = None) -> Dict[str, float]:
+        """count, error_rate, slow_rate and p95 (seconds) over the window."""
+        self._trim(time.monotonic() if now is None else now)
+        n = len(self._samples)
+        if not n:
+            return {"count": 0, "error_rate": 0.0, "slow_rate": 0.0, "p95": 0.0}
+        latencies = sorted(s[2] for s in self._samples)
+        return {
+            "count": n,
+            "error_rate": sum(1 for s in self._samples if not s[1]) / n,
+            "slow_rate": sum(1 for s in self._samples if s[2] >= slow_seconds) / n,
+            "p95": latencies[min(n - 1, int(math.ceil(0.95 * n)) - 1)],
+        }
+
+    def clear(self):
+        self._samples.clear()
+
+
+class CircuitBreaker:
+    """
+    closed -> open when, with at least min_calls in the window, the error rate
+    or slow-call rate reaches its threshold; open -> half_open after
+    open_seconds; half_open -> closed after `probes` fast successes, or back
+    to open on the first failed or slow probe.
+
+    acquire() returns a permit (the breaker's epoch) or None; pass it back to
+    record(). Results of calls started in an earlier epoch (e.g. in flight
+    when the breaker opened) are ignored, so only real probes decide a
+    half-open breaker.
+    """
+
+    def __init__(self, name: str, error_rate: float = 0.5, slow_seconds: float = 10.0, slow_rate: float = 0.5,
+                 min_calls: int = 5, window_seconds: float = 60.0, open_seconds: float = 30.0, probes: int = 1):
+        self.name = name
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds
+        self.slow_rate = slow_rate
+        self.min_calls = max(1, min_calls)
+        self.open_seconds = open_seconds
+        self.probes = max(1, probes)
+        self.state = CLOSED
+        self.epoch = 0
+        self.opened_at = 0.0
+        self._window = RollingWindow(window_seconds)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+        metrics.LLM_BREAKER_STATE.set(_STATE_VALUES[CLOSED], model=name)
+
+    def _transition(self, state: str, now: float):
+        self.state = state
+        self.epoch += 1
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self.opened_at = now
+        elif state == CLOSED:
+            self._window.clear()
+        metrics.LLM_BREAKER_STATE.set(_STATE_VALUES[state], model=self.name)
+        metrics.LLM_BREAKER_TRANSITIONS.inc(model=self.name, state=state)
+
+    def _refresh(self, now: float):
+        if self.state == OPEN and now - self.opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN, now)
+
+    def available(self) -> bool:
+        """Whether acquire() would currently succeed (takes nothing)."""
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self.state == HALF_OPEN:
+                return self._probes_in_flight < self.probes
+            return self.state == CLOSED
+
+    def acquire(self) -> Optional[int]:
+        with self._lock:
+            self._refresh(time.monotonic())
+            if self.state == OPEN:
+                return None
+            if self.state == HALF_OPEN:
+                if self._probes_in_flight >= self.probes:
+                    return None
+                self._probes_in_flight += 1
+            return self.epoch
+
+    def record(self, permit: int, ok: bool, latency: float):
+        with self._lock:
+            now = time.monotonic()
+            if permit != self.epoch:
+                return
+            healthy = ok and latency < self.slow_seconds
+            if self.state == HALF_OPEN:
+                self._probes_in_flight -= 1
+                if not healthy:
+                    self._transition(OPEN, now)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.probes:
+                    self._transition(CLOSED, now)
+                return
+            self._window.add(ok, latency, now)
+            s = self._window.summary(self.slow_seconds, now)
+            if s["count"] >= self.min_calls and (s["error_rate"] >= self.error_rate or s["slow_rate"] >= self.slow_rate):
+                self._transition(OPEN, now)
+
+    def release(self, permit: int):
+        """Give back a permit whose call was cancelled before it finished."""
+        with self._lock:
+            if permit == self.epoch and self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh(time.monotonic())
+            s = self._window.summary(self.slow_seconds)
+            return {"state": self.state, "window_calls": s["count"],
+                    "error_rate": round(s["error_rate"], 3), "slow_rate": round(s["slow_rate"], 3)}
+
+
+class ModelRouter:
+    def __init__(self, models: Iterable[str], stats_window: float = 300.0, min_samples: int = 5,
+                 hedge_after: float = 0.0, hedge_workers: int = 8, **breaker_options):
+        self.models: List[str] = [m for m in models if m]
+        if not self.models:
+            raise ValueError("ModelRouter needs at least one model")
+        self.min_samples = min_samples
+        self.hedge_after = hedge_after
+        self.hedge_workers = hedge_workers
+        self.breakers = {m: CircuitBreaker(m, **breaker_options) for m in self.models}
+        self._stats = {m: RollingWindow(stats_window) for m in self.models}
+        self._stats_lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        return cls(
+            models=[m.strip() for m in os.getenv("LLM_MODELS", "gemma2-9b-it").split(",")],
+            stats_window=float(os.getenv("LLM_ROUTING_WINDOW", "300")),
+            hedge_after=float(os.getenv("LLM_HEDGE_AFTER_MS", "0")) / 1000.0,
+            error_rate=float(os.getenv("LLM_BREAKER_ERROR_RATE", "0.5")),
+            slow_seconds=float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "10")),
+            slow_rate=float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5")),
+            min_calls=int(os.getenv("LLM_BREAKER_MIN_CALLS", "5")),
+            window_seconds=float(os.getenv("LLM_BREAKER_WINDOW", "60")),
+            open_seconds=float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30")),
+            probes=int(os.getenv("LLM_BREAKER_PROBES", "1")),
+        )
+
+    # -- routing --
+    def _stats_for(self, model: str) -> Dict[str, float]:
+        with self._stats_lock:
+            return self._stats[model].summary()
+
+    def _ranked(self, exclude: Iterable[str] = ()) -> List[str]:
+        """Available models, best first: unmeasured ones (configured order), then by p95 / success rate."""
+        def score(item: Tuple[int, str]) -> Tuple[int, float, int]:
+            index, model = item
+            s = self._stats_for(model)
+            if s["count"] < self.min_samples:
+                return (0, 0.0, index)
+            return (1, s["p95"] / max(0.05, 1.0 - s["error_rate"]), index)
+
+        candidates = [(i, m) for i, m in enumerate(self.models) if m not in exclude and self.breakers[m].available()]
+        return [m for _, m in sorted(candidates, key=score)]
+
+    def pick(self, exclude: Iterable[str] = ()) -> Tuple[str, int]:
+        """(model, permit) for the next call; raises CircuitOpenError when no breaker lets one through."""
+        for model in self._ranked(exclude):
+            permit = self.breakers[model].acquire()
+            if permit is not None:
+                return model, permit
+        raise CircuitOpenError("all LLM circuit breakers are open" if not exclude else "no other LLM model available")
+
+    def record(self, model: str, permit: int, ok: bool, latency: float):
+        with self._stats_lock:
+            self._stats[model].add(ok, latency)
+        self.breakers[model].record(permit, ok, latency)
+
+    def release(self, model: str, permit: int, elapsed: Optional[float] = None):
+        """
+        Give back the permit of a call abandoned before it finished. The
+        breaker learns nothing; with elapsed, routing stats keep it as a
+        lower bound on latency, so a model that always loses hedges still
+        counts as measured (and slow).
+        """
+        if elapsed is not None:
+            with self._stats_lock:
+                self._stats[model].add(True, elapsed)
+        self.breakers[model].release(permit)
+
+    def hedge_delay(self, model: str) -> float:
+        return max(self.hedge_after, self._stats_for(model)["p95"])
+
+    # -- sync --
+    def _run(self, model: str, permit: int, fn: Callable[[str], T]) -> T:
+        started = time.perf_counter()
+        try:
+            result = fn(model)
+        except Exception as e:
+            self.record(model, permit, not counts_as_failure(e), time.perf_counter() - started)
+            raise
+        self.record(model, permit, True, time.perf_counter() - started)
+        return result
+
+    def _hedge_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix="llm-hedge")
+        return self._pool
+
+    def _backup(self, primary: str) -> Optional[Tuple[str, int]]:
+        try:
+            return self.pick(exclude=[primary])
+        except CircuitOpenError:
+            permit = self.breakers[primary].acquire()
+            return (primary, permit) if permit is not None else None
+
+    def call(self, fn: Callable[[str], T], hedge: bool = False) -> T:
+        """
+        fn(model) on the best available model, recording its outcome. With
+        hedge=True (and LLM_HEDGE_AFTER_MS set) a slow first request gets a
+        backup; the loser keeps running in the background and is still
+        recorded, since a blocking HTTP call cannot be cancelled.
+        """
+        model, permit = self.pick()
+        if not (hedge and self.hedge_after > 0):
+            return self._run(model, permit, fn)
+
+        pool = self._hedge_pool()
+        first = pool.submit(self._run, model, permit, fn)
+        try:
+            return first.result(timeout=self.hedge_delay(model))
+        except FutureTimeout:
+            pass
+        backup = self._backup(model)
+        if backup is None:
+            return first.result()
+        second = pool.submit(self._run, backup[0], backup[1], fn)
+        pending, error = {first, second}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    metrics.LLM_HEDGES.inc(winner="primary" if fut is first else "backup")
+                    return fut.result()
+                error = error or fut.exception()
+        raise error
+
+    # -- asyncio --
+    async def _arun(self, model: str, permit: int, fn: Callable[[str], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        try:
+            result = await fn(model)
+        except asyncio.CancelledError:
+            self.release(model, permit, time.perf_counter() - started)
+            raise
+        except Exception as e:
+            self.record(model, permit, not counts_as_failure(e), time.perf_counter() - started)
+            raise
+        self.record(model, permit, True, time.perf_counter() - started)
+        return result
+
+    async def acall(self, fn: Callable[[str], Awaitable[T]], hedge: bool = False) -> T:
+        """call() for coroutines; the losing request of a hedged pair is cancelled."""
+        model, permit = self.pick()
+        if not (hedge and self.hedge_after > 0):
+            return await self._arun(model, permit, fn)
+
+        first = asyncio.ensure_future(self._arun(model, permit, fn))
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_delay(model))
+        if done:
+            return first.result()
+        backup = self._backup(model)
+        if backup is None:
+            return await first
+        second = asyncio.ensure_future(self._arun(backup[0], backup[1], fn))
+        pending, error = {first, second}, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        metrics.LLM_HEDGES.inc(winner="primary" if task is first else "backup")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-model breaker state and routing stats, preferred model first."""
+        models = []
+        for model in self.models:
+            s = self._stats_for(model)
+            models.append({
+                "model": model,
+                "breaker": self.breakers[model].snapshot(),
+                "calls": s["count"],
+                "p95_ms": round(s["p95"] * 1000, 1),
+                "error_rate": round(s["error_rate"], 3),
+            })
+        return {"models": models, "hedge_after_ms": round(self.hedge_after * 1000), "ranked": self._ranked()}
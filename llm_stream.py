@@ -0,0 +1,138 @@
+# backend/llm_stream.py
+"""
+Incremental parsing of a JSON object that is still being streamed.
+
+The scanner keeps its state between feed() calls, so every chunk is scanned
+once. snapshot() closes whatever is still open and returns the object parsed
+so far: an unfinished string value is cut at its last complete character;
+a dangling key, colon, comma or unfinished number/literal is dropped, and
+so are unfinished strings inside arrays (a list only shows complete items).
+
+    p = PartialJsonObject()
+    p.feed('```json\\n{"summary": "Met Dr. X ab')
+    p.snapshot()    # {'summary': 'Met Dr. X ab'}
+    p.feed('out insulin", "topics": ["insulin", "tri')
+    p.snapshot()    # {'summary': 'Met Dr. X about insulin', 'topics': ['insulin']}
+
+Text before the first "{" (prose, code fences) and after the matching "}" is ignored.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+_WHITESPACE = frozenset(" \t\r\n")
+
+
+class PartialJsonObject:
+    def __init__(self):
+        self.text = ""  # from the opening brace on
+        self.complete = False
+        self._started = False
+        # one [container, expecting] per open container; expecting is
+        # 'key' | 'colon' | 'value' | 'comma'
+        self._stack: List[list] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = False
+        self._unicode_left = 0
+        self._scalar = False  # inside a number or true/false/null
+        # longest prefix that is valid JSON once _safe_closers is appended
+        self._safe = 0
+        self._safe_closers = ""
+
+    def feed(self, chunk: str):
+        if self.complete or not chunk:
+            return
+        if not self._started:
+            start = chunk.find("{")
+            if start < 0:
+                return
+            chunk = chunk[start:]
+            self._started = True
+        pos = len(self.text)
+        self.text += chunk
+        for pos in range(pos, len(self.text)):
+            self._step(self.text[pos], pos)
+            if self.complete:
+                self.text = self.text[:pos + 1]
+                return
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """The object as far as it has arrived, or None before the opening brace."""
+        if not self._started:
+            return None
+        if self.complete:
+            candidate = self.text
+        elif self._in_string and not self._string_is_key and self._stack[-1][0] == "{":
+            end = len(self.text)
+            if self._escape:
+                end -= 1
+            elif self._unicode_left:
+                end -= 6 - self._unicode_left  # drop the unfinished \uXXXX
+            candidate = self.text[:end] + '"' + self._closers()
+        else:
+            candidate = self.text[:self._safe] + self._safe_closers
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+
+    # -- scanner --
+    def _closers(self) -> str:
+        return "".join("}" if frame[0] == "{" else "]" for frame in reversed(self._stack))
+
+    def _mark_safe(self, end: int):
+        self._safe = end
+        self._safe_closers = self._closers()
+
+    def _value_done(self, end: int):
+        self._stack[-1][1] = "comma"
+        self._mark_safe(end)
+
+    def _step(self, c: str, pos: int):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+                if c == "u":
+                    self._unicode_left = 4
+            elif self._unicode_left:
+                self._unicode_left -= 1
+            elif c == "\\":
+                self._escape = True
+            elif c == '"':
+                self._in_string = False
+                if self._string_is_key:
+                    self._stack[-1][1] = "colon"
+                else:
+                    self._value_done(pos + 1)
+            return
+
+        if self._scalar:
+            if c.isalnum() or c in "+-.":
+                return
+            self._scalar = False
+            self._value_done(pos)
+            # c is the delimiter after the scalar; handle it below
+
+        if c in _WHITESPACE:
+            return
+        frame = self._stack[-1] if self._stack else None
+        if c == '"':
+            self._in_string = True
+            self._string_is_key = frame is not None and frame[0] == "{" and frame[1] == "key"
+        elif c in "{[":
+            self._stack.append([c, "key" if c == "{" else "value"])
+            self._mark_safe(pos + 1)
+        elif c in "}]":
+            self._stack.pop()
+            if self._stack:
+                self._value_done(pos + 1)
+            else:
+                self.complete = True
+                self._mark_safe(pos + 1)
+        elif c == ":":
+            frame[1] = "value"
+        elif c == ",":
+            frame[1] = "key" if frame[0] == "{" else "value"
+        else:
+            self._scalar = True
@@ -0,0 +1,334 @@
+# backend/manage.py
+"""
+Maintenance commands.
+
+    python manage.py migrate
+    python manage.py rebuild-hcp-trends
+    python manage.py rebuild-reports
+    python manage.py rebuild-search-index
+    python manage.py build-similarity-index
+    python manage.py reprocess --exclude-model llama-3.1-8b-instant --concurrency 8
+    python manage.py archive-llm-raw
+    python manage.py prune-changes --days 30
+    python manage.py prune-jobs --days 7
+    python manage.py prune-llm-cache
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()  # before main reads its env constants
+
+import llm_archive  # noqa: E402
+import main  # noqa: E402
+import migrations  # noqa: E402
+import search  # noqa: E402
+
+
+def cmd_migrate(args):
+    started = time.perf_counter()
+    with main.engine.connect() as conn:
+        before = migrations.current_version(conn)
+    if args.list:
+        for m in migrations.MIGRATIONS:
+            print(f"{'x' if m.version <= before else ' '} {m.version:04d}_{m.name}")
+        return
+    applied = migrations.upgrade(main.engine, main.Base.metadata, target=args.to or migrations.HEAD)
+    with main.engine.connect() as conn:
+        after = migrations.current_version(conn)
+    print(f"Schema at version {after} ({len(applied)} applied, was {before}) in {time.perf_counter() - started:.1f}s")
+
+
+def cmd_rebuild_hcp_trends(args):
+    started = time.perf_counter()
+    db = main.SessionLocal()
+    try:
+        scanned = main.rebuild_hcp_trends(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Rebuilt HCP trends from {scanned} processed interactions in {time.perf_counter() - started:.1f}s")
+
+
+def cmd_rebuild_reports(args):
+    started = time.perf_counter()
+    db = main.SessionLocal()
+    try:
+        scanned = main.rebuild_reports(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Rebuilt reporting rollups from {scanned} interactions in {time.perf_counter() - started:.1f}s")
+
+
+def cmd_rebuild_search_index(args):
+    started = time.perf_counter()
+    with main.engine.begin() as conn:
+        search.ensure_search_schema(conn)
+        indexed = search.rebuild_index(conn, chunk_size=args.chunk_size)
+    if search.uses_shadow_table(main.engine):
+        print(f"Indexed {indexed} interactions in {time.perf_counter() - started:.1f}s")
+    else:
+        print("Search column is generated by the database; nothing to rebuild.")
+
+
+def cmd_build_similarity_index(args):
+    if main.similar_index is None:
+        raise SystemExit("ERROR: the similarity index needs numpy (pip install numpy)")
+    started = time.perf_counter()
+    if args.rebuild:
+        shutil.rmtree(main.SIMILARITY_INDEX_DIR, ignore_errors=True)
+    total, more = 0, True
+    while more:
+        # compact once at the end instead of every SIMILARITY_TAIL_ROWS
+        added, more = main.refresh_similar_index(limit=args.batch_size, compact=False)
+        total += added
+        elapsed = time.perf_counter() - started
+        print(f"\r{total} notes indexed ({total / max(elapsed, 1e-9):.0f}/s)", end="", flush=True)
+    main.similar_index.compact()
+    stats = main.similar_index.stats()
+    print(f"\nIndex holds {stats['notes']} notes ({stats['bytes'] / 1e6:.1f} MB) after {time.perf_counter() - started:.1f}s")
+
+
+def _read_checkpoint(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_checkpoint(path: str, checkpoint: dict):
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _duration(seconds: float) -> str:
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def cmd_reprocess(args):
+    """
+    Interactions matching the filters (as of the first run) are processed in
+    id order, `concurrency` chunks at a time. The checkpoint file records the
+    id below which every chunk has finished and the ids that failed; running
+    the same command again resumes from it and retries those ids first.
+    """
+    filters = {
+        "status": args.status,
+        "created_from": args.created_from.isoformat() if args.created_from else None,
+        "created_to": args.created_to.isoformat() if args.created_to else None,
+        "model": args.model,
+        "exclude_model": args.exclude_model,
+    }
+    conds = main.reprocess_filters(args.status, args.created_from, args.created_to, args.model, args.exclude_model)
+    checkpoint = None if args.restart else _read_checkpoint(args.checkpoint)
+    if checkpoint is not None and checkpoint["filters"] != filters:
+        raise SystemExit(f"ERROR: {args.checkpoint} was written for other filters {checkpoint['filters']}; "
+                         "repeat them to resume, or pass --restart")
+
+    db = main.SessionLocal()
+    try:
+        if checkpoint is None:
+            total, upto_id = main.reprocess_scope(db, conds)
+            checkpoint = {"filters": filters, "upto_id": upto_id, "after_id": 0, "processed": 0, "failed": []}
+        else:
+            total, _ = main.reprocess_scope(db, conds, checkpoint["after_id"], checkpoint["upto_id"])
+    finally:
+        db.close()
+    retries = checkpoint["failed"]
+    failed = set(retries)  # kept in the checkpoint until retried
+    total += len(retries)
+    print(f"Reprocessing {total} interactions ({len(retries)} retries) with {args.concurrency} concurrent chunks")
+    if not total:
+        return
+
+    per_chunk = main.LLM_BATCH_SIZE if (main.USE_REAL_GROQ and main.LLM_BATCH_SIZE > 1) else 1
+
+    def chunks():
+        """(last id or None for retries, ids) in submission order."""
+        for start in range(0, len(retries), per_chunk):
+            yield None, retries[start:start + per_chunk]
+        after_id = checkpoint["after_id"]
+        while True:
+            db = main.SessionLocal()
+            try:
+                page = main.reprocess_page(db, conds, after_id, checkpoint["upto_id"], args.page_size)
+            finally:
+                db.close()
+            if not page:
+                return
+            for start in range(0, len(page), per_chunk):
+                chunk = page[start:start + per_chunk]
+                yield chunk[-1], chunk
+            after_id = page[-1]
+
+    started = time.monotonic()
+    saved_at = started
+    done = 0
+    inflight = deque()  # (last id, ids, future) in submission order
+
+    def settle():
+        """Record finished chunks at the head of inflight; the checkpoint only moves past a contiguous prefix."""
+        nonlocal done, saved_at
+        while inflight and inflight[0][2].done() and not inflight[0][2].cancelled():
+            last_id, ids, fut = inflight.popleft()
+            try:
+                failed_ids = fut.result()
+            except Exception as e:
+                print(f"\nchunk {ids[0]}..{ids[-1]} failed: {e}")
+                failed_ids = ids
+            if last_id is None:
+                failed.difference_update(ids)
+            else:
+                checkpoint["after_id"] = last_id
+            failed.update(failed_ids)
+            done += len(ids)
+            checkpoint["processed"] += len(ids) - len(failed_ids)
+        now = time.monotonic()
+        if now - saved_at >= args.checkpoint_seconds:
+            checkpoint["failed"] = sorted(failed)
+            _write_checkpoint(args.checkpoint, checkpoint)
+            saved_at = now
+        rate = done / max(now - started, 1e-9)
+        eta = _duration((total - done) / rate) if rate else "?"
+        print(f"\r{done}/{total} interactions, {len(failed)} failed ({rate:.1f}/s, ETA {eta})", end="", flush=True)
+
+    pool = ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="reprocess")
+    try:
+        for last_id, ids in chunks():
+            # keep one chunk queued behind each running one, and no more
+            while True:
+                busy = [fut for _, _, fut in inflight if not fut.done()]
+                if len(busy) < 2 * args.concurrency:
+                    break
+                wait(busy, return_when=FIRST_COMPLETED)
+                settle()
+            inflight.append((last_id, ids, pool.submit(main.reprocess_interactions, ids)))
+        while inflight:
+            wait([inflight[0][2]])
+            settle()
+        pool.shutdown()
+    except KeyboardInterrupt:
+        print("\nInterrupted; waiting for running chunks to finish")
+        pool.shutdown(cancel_futures=True)
+        settle()
+        checkpoint["failed"] = sorted(failed)
+        _write_checkpoint(args.checkpoint, checkpoint)
+        raise SystemExit(f"Stopped after {done} interactions; run the same command again to resume")
+    checkpoint["failed"] = sorted(failed)
+    _write_checkpoint(args.checkpoint, checkpoint)
+    elapsed = time.monotonic() - started
+    print(f"\nReprocessed {done - len(failed)} interactions in {_duration(elapsed)} ({done / max(elapsed, 1e-9):.1f}/s)")
+    if failed:
+        print(f"{len(failed)} failed and kept their previous results; run the same command again to retry them")
+
+
+def cmd_archive_llm_raw(args):
+    started = time.perf_counter()
+    db = main.SessionLocal()
+    try:
+        moved = main.archive_llm_raw(db, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    print(f"Archived {moved} raw LLM responses ({llm_archive.CODEC}) in {time.perf_counter() - started:.1f}s")
+
+
+def cmd_prune_changes(args):
+    started = time.perf_counter()
+    deleted = main.prune_changes(args.days)
+    print(f"Deleted {deleted} change_log rows older than {args.days} days in {time.perf_counter() - started:.1f}s")
+
+
+def cmd_prune_jobs(args):
+    started = time.perf_counter()
+    db = main.SessionLocal()
+    try:
+        deleted = main.prune_jobs(db, args.days)
+    finally:
+        db.close()
+    print(f"Deleted {deleted} done/failed processing jobs older than {args.days} days in {time.perf_counter() - started:.1f}s")
+
+
+def cmd_prune_llm_cache(args):
+    started = time.perf_counter()
+    db = main.SessionLocal()
+    try:
+        deleted = main.prune_llm_cache(db)
+    finally:
+        db.close()
+    print(f"Deleted {deleted} expired llm_cache rows in {time.perf_counter() - started:.1f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="CRM backend maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate", help="apply pending schema migrations (run once per deploy, before the API)")
+    p.add_argument("--to", type=int, help="stop at this version (default: latest)")
+    p.add_argument("--list", action="store_true", help="show migrations and which are applied")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("rebuild-hcp-trends", help="recompute per-HCP trend aggregates from interactions")
+    p.add_argument("--chunk-size", type=int, default=1000)
+    p.set_defaults(func=cmd_rebuild_hcp_trends)
+
+    p = sub.add_parser("rebuild-reports", help="recompute the per-day reporting rollup from interactions (backfill)")
+    p.add_argument("--chunk-size", type=int, default=1000)
+    p.set_defaults(func=cmd_rebuild_reports)
+
+    p = sub.add_parser("rebuild-search-index", help="repopulate the SQLite FTS5 search table")
+    p.add_argument("--chunk-size", type=int, default=1000)
+    p.set_defaults(func=cmd_rebuild_search_index)
+
+    p = sub.add_parser("build-similarity-index", help="index processed interactions for /similar (catch-up or backfill)")
+    p.add_argument("--batch-size", type=int, default=20000)
+    p.add_argument("--rebuild", action="store_true", help="discard the existing index files first")
+    p.set_defaults(func=cmd_build_similarity_index)
+
+    p = sub.add_parser("reprocess", help="process matching interactions again (resumable; after a prompt or model change)")
+    p.add_argument("--status", help="only interactions with this status (e.g. processed)")
+    p.add_argument("--created-from", type=datetime.fromisoformat, help="created at or after (ISO date/time)")
+    p.add_argument("--created-to", type=datetime.fromisoformat, help="created before (ISO date/time)")
+    p.add_argument("--model", help="only results recorded from this model (llm_meta.model)")
+    p.add_argument("--exclude-model", help="skip results already recorded from this model")
+    p.add_argument("--concurrency", type=int, default=4, help="chunks processed at once")
+    p.add_argument("--page-size", type=int, default=1000, help="ids read per query")
+    p.add_argument("--checkpoint", default="reprocess-checkpoint.json", help="progress file (resume by rerunning)")
+    p.add_argument("--checkpoint-seconds", type=float, default=1.0, help="how often the progress file is written")
+    p.add_argument("--restart", action="store_true", help="ignore an existing checkpoint and start over")
+    p.set_defaults(func=cmd_reprocess)
+
+    p = sub.add_parser("archive-llm-raw", help="move groq_raw out of llm_meta into interaction_llm_raw")
+    p.add_argument("--chunk-size", type=int, default=500)
+    p.set_defaults(func=cmd_archive_llm_raw)
+
+    p = sub.add_parser("prune-changes", help="drop old /v1/changes history (clients behind it must resync)")
+    p.add_argument("--days", type=int, default=30, help="keep this many days of changes")
+    p.set_defaults(func=cmd_prune_changes)
+
+    p = sub.add_parser("prune-jobs", help="delete finished processing_job rows")
+    p.add_argument("--days", type=float, default=7, help="keep jobs finished within this many days")
+    p.set_defaults(func=cmd_prune_jobs)
+
+    p = sub.add_parser("prune-llm-cache", help="delete expired llm_cache rows")
+    p.set_defaults(func=cmd_prune_llm_cache)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    main.configure_database(main.Settings.from_env())
+    args.func(args)
@@ -0,0 +1,116 @@
+# backend/migrations.py
+"""
+Versioned schema migrations, applied out-of-band with
+
+    python manage.py migrate
+
+instead of by every API/worker process at import. The applied version is
+kept in schema_version; the API only reads it at startup (see
+main.check_schema) and refuses to serve when the database is behind.
+
+Steps build on the live table definitions in main's metadata so they stay
+short. A fresh database gets the current definition of a table from the
+step that creates it, so every step must be idempotent (checkfirst / IF NOT
+EXISTS): later steps then find their objects already present and only record
+the version. Databases created by the old import-time create_all upgrade the
+same way.
+
+On PostgreSQL each step runs in its own transaction under an advisory lock,
+so concurrent `migrate` runs (e.g. from several deploy hosts) apply every
+step exactly once.
+"""
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+import search
+
+# arbitrary key for pg_advisory_xact_lock
+ADVISORY_LOCK_ID = 7_301_115
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable  # (conn, metadata) -> None
+
+
+def _create_tables(*names: str) -> Callable:
+    def upgrade(conn, metadata: MetaData):
+        for name in names:
+            metadata.tables[name].create(conn, checkfirst=True)
+    return upgrade
+
+
+def _create_indexes(table: str, *index_names: str) -> Callable:
+    def upgrade(conn, metadata: MetaData):
+        indexes = {ix.name: ix for ix in metadata.tables[table].indexes}
+        for name in index_names:
+            indexes[name].create(conn, checkfirst=True)
+    return upgrade
+
+
+def _search_schema(conn, metadata: MetaData):
+    search.ensure_search_schema(conn)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial", _create_tables("hcp", "interaction")),
+    Migration(2, "processing_queue", _create_tables("processing_job")),
+    Migration(3, "llm_cache", _create_tables("llm_cache")),
+    Migration(4, "interaction_keyset_indexes", _create_indexes(
+        "interaction",
+        "ix_interaction_created_id", "ix_interaction_hcp_created_id",
+        "ix_interaction_rep_created_id", "ix_interaction_status_created_id",
+    )),
+    Migration(5, "hcp_trend_aggregates", _create_tables("hcp_trend", "hcp_topic_daily")),
+    Migration(6, "interaction_search", _search_schema),
+    Migration(7, "interaction_llm_raw", _create_tables("interaction_llm_raw")),
+    Migration(8, "reporting_rollups", _create_tables("interaction_daily")),
+    Migration(9, "interaction_updated_index", _create_indexes("interaction", "ix_interaction_updated_id")),
+    Migration(10, "change_log", _create_tables("change_log")),
+]
+HEAD = MIGRATIONS[-1].version
+
+
+def current_version(conn) -> int:
+    """Highest applied version; 0 for a database that was never migrated."""
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1)).scalar() or 0
+
+
+def pending(conn) -> List[Migration]:
+    version = current_version(conn)
+    return [m for m in MIGRATIONS if m.version > version]
+
+
+def upgrade(engine, metadata: MetaData, target: int = HEAD, log: Callable[[str], None] = print) -> List[Migration]:
+    """Apply pending migrations up to `target`, one transaction each. Returns the ones applied."""
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version > target:
+            break
+        with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+            # re-read under the lock: another process may have applied it meanwhile
+            if current_version(conn) >= migration.version:
+                continue
+            log(f"applying {migration.version:04d}_{migration.name}")
+            migration.upgrade(conn, metadata)
+            conn.execute(schema_version.insert().values(version=migration.version, name=migration.name))
+        applied.append(migration)
+    return applied
@@ -0,0 +1,188 @@
+# backend/pubsub.py
+"""
+Small pub/sub used to push interaction status changes to SSE clients.
+
+Publishers (API and worker processes) call Broker.publish(topics, data); each
+API process runs one listener that fans messages out to its local
+subscribers. The backend decides how messages travel between processes:
+
+    PostgresNotifyBackend  NOTIFY/LISTEN on one channel - works across workers
+    InMemoryBackend        same-process delivery only - for tests / single process
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger("pubsub")
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_BYTES = 7900
+
+
+class InMemoryBackend:
+    def __init__(self):
+        self._deliver: Optional[Callable[[str], None]] = None
+
+    def start(self, deliver: Callable[[str], None]):
+        self._deliver = deliver
+
+    def publish(self, message: str):
+        if self._deliver is not None:
+            self._deliver(message)
+
+    def stop(self):
+        self._deliver = None
+
+
+class PostgresNotifyBackend:
+    CHANNEL = "interaction_events"
+
+    def __init__(self, dsn: str, reconnect_delay: float = 2.0):
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def start(self, deliver: Callable[[str], None]):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, args=(deliver,), name="pubsub-listen", daemon=True)
+        self._thread.start()
+
+    def _listen(self, deliver: Callable[[str], None]):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.CHANNEL}")
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        deliver(conn.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("LISTEN connection lost; reconnecting")
+                self._stop.wait(self.reconnect_delay)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def publish(self, message: str):
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publish_conn is None or self._publish_conn.closed:
+                        self._publish_conn = self._connect()
+                    with self._publish_conn.cursor() as cur:
+                        cur.execute("SELECT pg_notify(%s, %s)", (self.CHANNEL, message))
+                    return
+                except Exception:
+                    self._publish_conn = None
+                    if attempt:
+                        raise
+
+    def stop(self):
+        self._stop.set()
+        if self._publish_conn is not None:
+            self._publish_conn.close()
+            self._publish_conn = None
+
+
+class Subscription:
+    """Bounded asyncio queue fed from the listener thread; slow clients drop events."""
+
+    def __init__(self, broker: "Broker", topics: Iterable[str], maxsize: int = 100):
+        self.broker = broker
+        self.topics = list(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=maxsize)
+
+    def _put(self, data: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            pass
+
+    def push(self, data: Dict[str, Any]):
+        self.loop.call_soon_threadsafe(self._put, data)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class Broker:
+    def __init__(self, backend):
+        self.backend = backend
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.backend.start(self._deliver)
+
+    def stop(self):
+        with self._lock:
+            self._started = False
+        self.backend.stop()
+
+    def publish(self, topics: List[str], data: Dict[str, Any]):
+        message = json.dumps({"topics": topics, "data": data}, default=str)
+        if len(message.encode("utf-8")) > MAX_NOTIFY_BYTES:
+            # keep the status transition, let the client fetch the full record
+            slim = {k: data.get(k) for k in ("id", "rep_id", "hcp_id", "status", "updated_at")}
+            message = json.dumps({"topics": topics, "data": {**slim, "truncated": True}}, default=str)
+        self.backend.publish(message)
+
+    def _deliver(self, message: str):
+        try:
+            envelope = json.loads(message)
+        except ValueError:
+            return
+        with self._lock:
+            targets = set()
+            for topic in envelope.get("topics", []):
+                targets.update(self._subscribers.get(topic, ()))
+        for sub in targets:
+            sub.push(envelope.get("data") or {})
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Must be called from the event loop that will consume the events."""
+        self.start()
+        sub = Subscription(self, topics)
+        with self._lock:
+            for topic in sub.topics:
+                self._subscribers.setdefault(topic, set()).add(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription):
+        with self._lock:
+            for topic in sub.topics:
+                subs = self._subscribers.get(topic)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[topic]
@@ -0,0 +1,178 @@
+# backend/search.py
+"""
+Full-text search over interaction notes, summaries and topics.
+
+PostgreSQL: a generated, weighted tsvector column (interaction.search_vector)
+with a GIN index; the database keeps it current on every write.
+SQLite: an FTS5 table (interaction_fts, rowid = interaction.id) that is
+written in the same transaction as the interaction row (see main's
+after_flush hook and index_rows).
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+PG_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(summary, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(topics::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(raw_text, '')), 'C')"
+)
+
+
+def ensure_search_schema(conn):
+    """Create the search column/index or FTS table if missing (idempotent)."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        conn.execute(text(
+            f"ALTER TABLE interaction ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({PG_VECTOR}) STORED"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_interaction_search_vector ON interaction USING GIN (search_vector)"
+        ))
+    elif dialect == "sqlite":
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS interaction_fts "
+            "USING fts5(raw_text, summary, topics, tokenize='porter unicode61')"
+        ))
+
+
+def uses_shadow_table(conn) -> bool:
+    return conn.dialect.name == "sqlite"
+
+
+def _topics_text(topics: Any) -> str:
+    if not topics:
+        return ""
+    if isinstance(topics, (list, tuple)):
+        return " ".join(str(t) for t in topics)
+    return str(topics)
+
+
+def index_rows(conn, rows: Iterable[Tuple[int, Optional[str], Optional[str], Any]]):
+    """(Re)index (id, raw_text, summary, topics) rows in the FTS5 table; no-op elsewhere."""
+    if not uses_shadow_table(conn):
+        return
+    params = [
+        {"id": i, "raw_text": raw or "", "summary": summary or "", "topics": _topics_text(topics)}
+        for i, raw, summary, topics in rows
+    ]
+    if not params:
+        return
+    conn.execute(text("DELETE FROM interaction_fts WHERE rowid = :id"), [{"id": p["id"]} for p in params])
+    conn.execute(
+        text("INSERT INTO interaction_fts (rowid, raw_text, summary, topics) VALUES (:id, :raw_text, :summary, :topics)"),
+        params,
+    )
+
+
+def remove_rows(conn, ids: Iterable[int]):
+    if not uses_shadow_table(conn):
+        return
+    params = [{"id": i} for i in ids]
+    if params:
+        conn.execute(text("DELETE FROM interaction_fts WHERE rowid = :id"), params)
+
+
+def rebuild_index(conn, chunk_size: int = 1000) -> int:
+    """Repopulate the FTS5 table from the interaction table. Returns rows indexed."""
+    if not uses_shadow_table(conn):
+        return 0
+    conn.execute(text("DELETE FROM interaction_fts"))
+    last_id, total = 0, 0
+    while True:
+        rows = conn.execute(
+            text("SELECT id, raw_text, summary, topics FROM interaction WHERE id > :last ORDER BY id LIMIT :n"),
+            {"last": last_id, "n": chunk_size},
+        ).all()
+        if not rows:
+            return total
+        index_rows(conn, [(r[0], r[1], r[2], json.loads(r[3]) if isinstance(r[3], str) else r[3]) for r in rows])
+        last_id = rows[-1][0]
+        total += len(rows)
+
+
+def _fts5_query(q: str) -> str:
+    # every term quoted: user input can never be parsed as FTS5 syntax; terms are ANDed
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in q.split())
+
+
+def search_interactions(
+    conn,
+    q: str,
+    hcp_id: Optional[int] = None,
+    rep_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """Ranked matches (best first) with a highlighted snippet around the hits."""
+    params: Dict[str, Any] = {"limit": limit}
+    filters = []
+    if hcp_id is not None:
+        filters.append("i.hcp_id = :hcp_id")
+        params["hcp_id"] = hcp_id
+    if rep_id:
+        filters.append("i.rep_id = :rep_id")
+        params["rep_id"] = rep_id
+    if created_from:
+        filters.append("i.created_at >= :created_from")
+        params["created_from"] = created_from
+    if created_to:
+        filters.append("i.created_at < :created_to")
+        params["created_to"] = created_to
+    where = "".join(f" AND {f}" for f in filters)
+
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        params["q"] = q
+        # rank and limit first, then build headlines for the surviving rows only
+        sql = f"""
+            WITH query AS (SELECT websearch_to_tsquery('english', :q) AS tsq),
+            hits AS (
+                SELECT i.id, ts_rank_cd(i.search_vector, query.tsq) AS rank
+                FROM interaction i, query
+                WHERE i.search_vector @@ query.tsq{where}
+                ORDER BY rank DESC, i.id DESC
+                LIMIT :limit
+            )
+            SELECT i.id, i.hcp_id, i.rep_id, i.status, i.created_at, i.summary, hits.rank,
+                   ts_headline('english', coalesce(i.summary, '') || ' ' || coalesce(i.raw_text, ''), query.tsq,
+                               'StartSel=<mark>, StopSel=</mark>, MaxWords=30, MinWords=10') AS highlight
+            FROM hits JOIN interaction i ON i.id = hits.id, query
+            ORDER BY hits.rank DESC, i.id DESC
+        """
+    elif dialect == "sqlite":
+        params["q"] = _fts5_query(q)
+        if not params["q"]:
+            return []
+        # bm25: lower is better; summary hits weigh most, then topics, then notes
+        sql = f"""
+            SELECT i.id, i.hcp_id, i.rep_id, i.status, i.created_at, i.summary,
+                   -bm25(interaction_fts, 1.0, 3.0, 2.0) AS rank,
+                   snippet(interaction_fts, -1, '<mark>', '</mark>', '…', 16) AS highlight
+            FROM interaction_fts JOIN interaction i ON i.id = interaction_fts.rowid
+            WHERE interaction_fts MATCH :q{where}
+            ORDER BY rank DESC, i.id DESC
+            LIMIT :limit
+        """
+    else:
+        raise NotImplementedError(f"full-text search is not supported on {dialect}")
+
+    out = []
+    for r in conn.execute(text(sql), params).mappings():
+        created_at = r["created_at"]
+        out.append({
+            "id": r["id"],
+            "hcp_id": r["hcp_id"],
+            "rep_id": r["rep_id"],
+            "status": r["status"],
+            # raw SQL on SQLite returns the stored text ("YYYY-MM-DD HH:MM:SS...")
+            "created_at": created_at.isoformat() if isinstance(created_at, datetime) else str(created_at).replace(" ", "T", 1),
+            "summary": r["summary"],
+            "rank": float(r["rank"] or 0.0),
+            "highlight": r["highlight"],
+        })
+    return out
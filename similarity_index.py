@@ -0,0 +1,516 @@
+# backend/similarity_index.py
+"""
+On-disk hashed TF-IDF index of interaction notes for "similar interactions"
+queries, with no embedding service.
+
+Notes are tokenized by the caller (text_analytics content words), and each
+word is hashed into one of 2**hash_bits term slots (crc32, stable across
+processes). A note is stored as its term slots and counts; weights are
+(1 + log tf) * idf, and scores are cosine similarities.
+
+The index directory holds two segments plus meta.json, which names them:
+
+  base-<gen>-*.npy   term-major (CSC) matrix over all notes at the last
+                     compaction, rows ordered by interaction id; values are
+                     pre-normalized with that compaction's idf. Loaded with
+                     np.load(mmap_mode="r"), so a query only pages in the
+                     postings of its own terms.
+  tail-<gen>.*       row-major raw arrays appended as interactions are
+                     (re)processed; weighted with the current idf at load.
+
+A query scores the tail directly, then finds the exact top k of the base
+without reading every posting of its common terms (see _BaseQuery). Re-indexing a
+note appends a new tail row that supersedes the old one. Once the tail holds
+tail_max_rows rows it is folded into a new base generation (compaction),
+which also drops superseded rows and refreshes idf.
+
+Any number of processes may share a directory: writers serialize on an
+fcntl lock, tail files are truncated to the committed length before each
+append, and meta.json is replaced atomically, so readers only ever see
+committed rows. Files of an old generation are unlinked after compaction;
+processes that still map them keep a valid view until their next reload.
+
+Requires numpy; `available` is False without it.
+
+    index = SimilarityIndex("similarity_index")
+    index.update(fetch)                              # see update()
+    index.query(words, k=10, hcp_id=7, exclude=42)   # [(interaction_id, score), ...]
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # endpoint reports the index as unavailable
+    np = None
+
+available = np is not None
+
+FORMAT = 1
+# per-row tail arrays and per-nonzero tail arrays, with their dtypes
+_TAIL_ROW_FILES = (("docs", "int64"), ("hcp", "int64"), ("stamp", "float64"), ("nnz", "int32"))
+_TAIL_NNZ_FILES = (("terms", "int32"), ("tf", "uint16"))
+_BASE_FILES = ("indptr", "rows", "tf", "val", "maxval", "docs", "hcp", "byhcp", "stamp")
+
+Row = Tuple[int, Optional[int], float, Sequence[str]]  # interaction id, hcp id, stamp, words
+Cursor = Optional[list]
+
+
+def hash_terms(words: Iterable[str], hash_bits: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Sorted distinct term slots of words and their counts."""
+    mask = (1 << hash_bits) - 1
+    counts: Dict[int, int] = {}
+    for w in words:
+        slot = zlib.crc32(w.encode()) & mask
+        counts[slot] = counts.get(slot, 0) + 1
+    slots = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+    return slots, np.fromiter((counts[s] for s in slots.tolist()), dtype=np.uint16, count=len(counts))
+
+
+def _tf_weight(tf: "np.ndarray") -> "np.ndarray":
+    return 1.0 + np.log(tf.astype(np.float32))
+
+
+def _idf(df: "np.ndarray", n: int) -> "np.ndarray":
+    return (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+
+
+class _State:
+    """One immutable view of the index (a generation and committed tail length)."""
+
+    def __init__(self, path: str, meta: dict):
+        self.meta = meta
+        self.generation = meta["generation"]
+        self.hash_bits = meta["hash_bits"]
+        slots = 1 << self.hash_bits
+        gen = self.generation
+
+        if meta["base_rows"]:
+            base = {name: np.load(os.path.join(path, f"base-{gen}-{name}.npy"), mmap_mode="r") for name in _BASE_FILES}
+        else:
+            base = {"indptr": np.zeros(slots + 1, dtype=np.int64), "maxval": np.zeros(slots, dtype=np.float32)}
+            base.update({name: np.empty(0, dtype=dt) for name, dt in (
+                ("rows", "int32"), ("tf", "uint16"), ("val", "float32"),
+                ("docs", "int64"), ("hcp", "int64"), ("byhcp", "int64"), ("stamp", "float64"))})
+        self.base_indptr, self.base_rows, self.base_tf, self.base_val = base["indptr"], base["rows"], base["tf"], base["val"]
+        self.base_maxval = base["maxval"]  # per term, the largest value in its postings
+        self.base_docs, self.base_hcp, self.base_stamp = base["docs"], base["hcp"], base["stamp"]
+        self.base_byhcp = base["byhcp"]  # rows ordered by hcp
+        self.n_base = len(self.base_docs)
+
+        def tail(name, dtype, count):
+            file = os.path.join(path, f"tail-{gen}.{name}")
+            if not count:
+                return np.empty(0, dtype=dtype)
+            return np.memmap(file, dtype=dtype, mode="r", shape=(count,))
+
+        self.n_tail = meta["tail_rows"]
+        for name, dtype in _TAIL_ROW_FILES:
+            setattr(self, "tail_" + name, tail(name, dtype, self.n_tail))
+        for name, dtype in _TAIL_NNZ_FILES:
+            setattr(self, "tail_" + name, tail(name, dtype, meta["tail_nnz"]))
+        self.tail_ptr = np.zeros(self.n_tail + 1, dtype=np.int64)
+        np.cumsum(self.tail_nnz, out=self.tail_ptr[1:])
+
+        # idf over every stored row (superseded ones count until the next compaction)
+        self.n = self.n_base + self.n_tail
+        self.df = np.diff(self.base_indptr) + np.bincount(self.tail_terms, minlength=slots)
+        self.idf = _idf(self.df, self.n)
+
+        # the last tail row of a document supersedes its earlier tail rows and its base row
+        self.tail_latest: Dict[int, int] = {}
+        for i, doc in enumerate(self.tail_docs.tolist()):
+            self.tail_latest[doc] = i
+        self.tail_alive = np.zeros(self.n_tail, dtype=bool)
+        self.tail_alive[list(self.tail_latest.values())] = True
+        self.base_alive = np.ones(self.n_base, dtype=bool)
+        if self.tail_latest and self.n_base:
+            self.base_alive &= ~np.isin(self.base_docs, np.fromiter(self.tail_latest, dtype=np.int64))
+
+        if self.n_tail:
+            val = _tf_weight(self.tail_tf) * self.idf[self.tail_terms]
+            norms = np.sqrt(np.add.reduceat(val * val, self.tail_ptr[:-1]))
+            self.tail_val = val / np.repeat(norms, self.tail_nnz)
+        else:
+            self.tail_val = np.empty(0, dtype=np.float32)
+
+    def stamp_of(self, doc: int) -> Optional[float]:
+        """Stamp of the row currently indexed for doc, or None."""
+        i = self.tail_latest.get(doc)
+        if i is not None:
+            return float(self.tail_stamp[i])
+        j = int(np.searchsorted(self.base_docs, doc))
+        if j < self.n_base and self.base_docs[j] == doc:
+            return float(self.base_stamp[j])
+        return None
+
+
+def _kth(scores: "np.ndarray", k: int) -> float:
+    """The kth best score, or 0 when there are fewer than k."""
+    return float(np.partition(scores, -k)[-k]) if len(scores) >= k else 0.0
+
+
+class _BaseQuery:
+    """
+    Exact top k over the base segment, MaxScore style: a doc that has none of
+    the query's "essential" terms scores at most the summed upper bounds of
+    the others, so once k docs are known to beat that sum only the postings
+    of the essential (rare, heavy) terms are gathered. The remaining terms
+    are looked up for the surviving candidates by binary search, since every
+    posting list is sorted by row.
+    """
+
+    SEED_ROWS = 500  # candidates scored up front to find a first kth score
+
+    def __init__(self, state: _State, slots, weights, hcp_id: Optional[int], exclude: Optional[int]):
+        self.state = state
+        self.hcp_id = hcp_id
+        self.exclude = exclude
+        lo = np.asarray(state.base_indptr[slots])
+        hi = np.asarray(state.base_indptr[slots + 1])
+        present = hi > lo
+        bound = weights[present] * state.base_maxval[slots[present]]
+        order = np.argsort(bound, kind="stable")  # weakest first
+        self.lo, self.hi = lo[present][order], hi[present][order]
+        self.weights = weights[present][order]
+        self.prefix = np.cumsum(bound[order])  # prefix[i]: best score from terms 0..i alone
+
+    def _postings(self, i: int):
+        lo, hi = int(self.lo[i]), int(self.hi[i])
+        return self.state.base_rows[lo:hi], self.state.base_val[lo:hi]
+
+    def _allowed(self, rows):
+        """rows that are current and pass the query's filters."""
+        state = self.state
+        keep = state.base_alive[rows]
+        if self.hcp_id is not None:
+            keep &= state.base_hcp[rows] == self.hcp_id
+        if self.exclude is not None:
+            keep &= state.base_docs[rows] != self.exclude
+        return keep
+
+    def _add_scores(self, rows, scores, terms):
+        """Add the contribution of terms to scores of rows (sorted, distinct)."""
+        for i in terms:
+            posting_rows, vals = self._postings(i)
+            pos = np.searchsorted(posting_rows, rows).clip(max=len(posting_rows) - 1)
+            hit = posting_rows[pos] == rows
+            scores[hit] += self.weights[i] * vals[pos[hit]]
+        return scores
+
+    def _hcp_rows(self):
+        state = self.state
+        lo = int(np.searchsorted(state.base_hcp, self.hcp_id, side="left", sorter=state.base_byhcp))
+        hi = int(np.searchsorted(state.base_hcp, self.hcp_id, side="right", sorter=state.base_byhcp))
+        return np.sort(state.base_byhcp[lo:hi])
+
+    def top(self, k: int, floor: float = 0.0):
+        """Up to k (docs, scores) of the base; floor is a kth score already reached elsewhere."""
+        terms = len(self.weights)
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        if self.hcp_id is not None:
+            # one HCP's rows are few: score them all directly
+            rows = self._hcp_rows()
+            rows = rows[self._allowed(rows)]
+            scores = self._add_scores(rows, np.zeros(len(rows)), range(terms))
+            return self._result(rows, scores, k)
+
+        # a first kth score from the rows of the strongest terms
+        seed, size = [], 0
+        for i in range(terms - 1, -1, -1):
+            seed.append(self._postings(i)[0])
+            size += len(seed[-1])
+            if size >= self.SEED_ROWS:
+                break
+        rows = np.unique(np.concatenate(seed))
+        rows = rows[self._allowed(rows)]
+        theta = max(floor, _kth(self._add_scores(rows, np.zeros(len(rows)), range(terms)), k))
+
+        # terms whose bounds sum below theta cannot lift a doc into the top k on their own
+        optional = int(np.searchsorted(self.prefix, theta, side="left"))
+        if optional == terms:
+            return np.empty(0, dtype=np.int64), np.empty(0)  # floor is out of reach
+        rows, vals = [], []
+        for i in range(optional, terms):
+            posting_rows, posting_vals = self._postings(i)
+            rows.append(posting_rows)
+            vals.append(posting_vals * self.weights[i])
+        rows, vals = np.concatenate(rows), np.concatenate(vals)
+        # docs must reach theta with at most prefix[optional - 1] still to come
+        cutoff = theta - self.prefix[optional - 1] - 1e-9 if optional else 0.0
+        if len(rows) * 64 > self.state.n_base:
+            dense = np.bincount(rows, vals, minlength=self.state.n_base)
+            rows = np.flatnonzero(dense >= cutoff) if cutoff > 0 else np.flatnonzero(dense)
+            scores = dense[rows]
+        else:
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, vals, minlength=len(rows))
+            keep = scores >= cutoff
+            rows, scores = rows[keep], scores[keep]
+        keep = self._allowed(rows)
+        rows, scores = rows[keep], scores[keep]
+        theta = max(theta, _kth(scores, k))  # scores only grow from here
+        # optional terms, strongest first, dropping docs that can no longer reach theta
+        for i in range(optional - 1, -1, -1):
+            keep = scores + self.prefix[i] >= theta - 1e-9
+            rows, scores = rows[keep], scores[keep]
+            scores = self._add_scores(rows, scores, (i,))
+        return self._result(rows, scores, k)
+
+    def _result(self, rows, scores, k: int):
+        keep = scores > 0
+        rows, scores = rows[keep], scores[keep]
+        if len(rows) > k:
+            top = np.argpartition(scores, -k)[-k:]
+            rows, scores = rows[top], scores[top]
+        return np.asarray(self.state.base_docs[rows]), scores
+
+
+class SimilarityIndex:
+    def __init__(self, path: str, hash_bits: int = 20, tail_max_rows: int = 20000,
+                 max_query_terms: int = 32, max_df: float = 0.2, refresh_seconds: float = 5.0):
+        self.path = path
+        self.hash_bits = hash_bits
+        self.tail_max_rows = tail_max_rows
+        self.max_query_terms = max_query_terms
+        self.max_df = max_df
+        self.refresh_seconds = refresh_seconds
+        self._state: Optional[_State] = None
+        self._lock = threading.Lock()  # one updater per process; the file lock covers other processes
+        self._refreshed_at = 0.0
+
+    # -- files --
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self._file("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return {"format": FORMAT, "hash_bits": self.hash_bits, "generation": 0,
+                    "base_rows": 0, "tail_rows": 0, "tail_nnz": 0, "cursor": None}
+        if meta.get("format") != FORMAT:
+            raise RuntimeError(f"{self.path}: unsupported index format {meta.get('format')}; rebuild it")
+        return meta
+
+    def _write_meta(self, meta: dict):
+        tmp = self._file(f"meta.json.{os.getpid()}")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._file("meta.json"))
+
+    @contextmanager
+    def _writing(self):
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._file("lock"), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield self._load(self._read_meta())
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self, meta: dict) -> _State:
+        state = self._state
+        if state is None or state.meta != meta:
+            state = self._state = _State(self.path, meta)
+        return state
+
+    # -- reading --
+    def state(self) -> _State:
+        """The current view, mapping the committed files on first use."""
+        if self._state is None:
+            with self._lock:
+                if self._state is None:
+                    self._load(self._read_meta())
+        return self._state
+
+    def __len__(self) -> int:
+        state = self.state()
+        return int(state.base_alive.sum() + state.tail_alive.sum())
+
+    def query(self, words: Sequence[str], k: int = 10, hcp_id: Optional[int] = None,
+              exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Top k (interaction id, cosine score) for a note given as words,
+        optionally only among one HCP's interactions and without `exclude`.
+        Terms in more than max_df of all notes are skipped (unless that
+        leaves none), as are all but the max_query_terms strongest; scores
+        over the remaining terms are exact.
+        """
+        state = self.state()
+        if not state.n or not words:
+            return []
+        slots, tf = hash_terms(words, state.hash_bits)
+        weights = _tf_weight(tf) * state.idf[slots]
+        weights /= np.sqrt(np.dot(weights, weights))
+        use = state.df[slots] > 0
+        if state.n >= 100:
+            common = state.df[slots] > self.max_df * state.n
+            if (use & ~common).any():
+                use &= ~common
+        slots, weights = slots[use], weights[use]
+        if len(slots) > self.max_query_terms:
+            top = np.argpartition(weights, -self.max_query_terms)[-self.max_query_terms:]
+            top.sort()
+            slots, weights = slots[top], weights[top]
+        if not len(slots):
+            return []
+
+        # tail first: every row is scored, and its best scores raise the bar for the base
+        docs, scores = np.empty(0, dtype=np.int64), np.empty(0)
+        if state.n_tail:
+            pos = np.searchsorted(slots, state.tail_terms).clip(max=len(slots) - 1)
+            contrib = np.where(slots[pos] == state.tail_terms, state.tail_val * weights[pos], 0.0)
+            tail_scores = np.add.reduceat(contrib, state.tail_ptr[:-1])
+            keep = state.tail_alive & (tail_scores > 0)
+            if hcp_id is not None:
+                keep &= state.tail_hcp == hcp_id
+            if exclude is not None:
+                keep &= state.tail_docs != exclude
+            docs, scores = np.asarray(state.tail_docs)[keep], tail_scores[keep]
+        if state.n_base:
+            base_docs, base_scores = _BaseQuery(state, slots, weights, hcp_id, exclude).top(k, _kth(scores, k))
+            docs, scores = np.concatenate([docs, base_docs]), np.concatenate([scores, base_scores])
+
+        if len(docs) > k:
+            top = np.argpartition(scores, -k)[-k:]
+            docs, scores = docs[top], scores[top]
+        order = np.lexsort((docs, -scores))
+        return [(int(docs[i]), round(min(float(scores[i]), 1.0), 6)) for i in order]
+
+    # -- writing --
+    def due(self) -> bool:
+        return time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    def update(self, fetch: Callable[[Cursor, Callable[[int], Optional[float]]], Tuple[Iterable[Row], Cursor]],
+               compact: bool = True) -> int:
+        """
+        Append new or changed notes. fetch(cursor, indexed_stamp) returns the
+        rows to index and the cursor to store for the next call; rows whose
+        stamp is not newer than indexed_stamp(id) are skipped, so fetch may
+        safely re-read an overlap. Compacts when the tail is full (unless
+        compact is False). Returns rows appended.
+        """
+        try:
+            with self._writing() as state:
+                return self._update(state, fetch, compact)
+        finally:
+            self._refreshed_at = time.monotonic()  # failures also wait for the next period
+
+    def _update(self, state: _State, fetch, compact: bool) -> int:
+        rows, cursor = fetch(state.meta["cursor"], state.stamp_of)
+        pending: Dict[int, tuple] = {}
+        for doc, hcp, stamp, words in rows:
+            indexed = state.stamp_of(doc)
+            if (indexed is not None and stamp <= indexed) or (doc in pending and stamp <= pending[doc][2]):
+                continue
+            slots, tf = hash_terms(words, state.hash_bits)
+            if len(slots):
+                pending[doc] = (doc, hcp or 0, stamp, slots, tf)
+        meta = dict(state.meta, cursor=cursor)
+        if pending:
+            self._append(meta, list(pending.values()))
+        if meta != state.meta:
+            self._write_meta(meta)
+            state = self._load(meta)
+        if compact and state.n_tail >= self.tail_max_rows:
+            self._compact(state)
+        return len(pending)
+
+    def _append(self, meta: dict, rows: List[tuple]):
+        gen = meta["generation"]
+        columns = {
+            "docs": np.array([r[0] for r in rows], dtype=np.int64),
+            "hcp": np.array([r[1] for r in rows], dtype=np.int64),
+            "stamp": np.array([r[2] for r in rows], dtype=np.float64),
+            "nnz": np.array([len(r[3]) for r in rows], dtype=np.int32),
+            "terms": np.concatenate([r[3] for r in rows]),
+            "tf": np.concatenate([r[4] for r in rows]),
+        }
+        for files, committed in ((_TAIL_ROW_FILES, meta["tail_rows"]), (_TAIL_NNZ_FILES, meta["tail_nnz"])):
+            for name, dtype in files:
+                with open(self._file(f"tail-{gen}.{name}"), "ab") as f:
+                    # drop anything a crashed writer left past the committed length
+                    f.truncate(committed * np.dtype(dtype).itemsize)
+                    f.write(columns[name].tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+        meta["tail_rows"] += len(rows)
+        meta["tail_nnz"] += len(columns["terms"])
+
+    def compact(self):
+        """Fold the tail into a new base generation now."""
+        with self._writing() as state:
+            self._compact(state)
+
+    def _compact(self, state: _State):
+        slots = 1 << state.hash_bits
+        # (row, term, tf) of every live base and tail entry, rows numbered base then tail
+        base_terms = np.repeat(np.arange(slots, dtype=np.int32), np.diff(state.base_indptr))
+        base_keep = state.base_alive[state.base_rows]
+        tail_row = np.repeat(np.arange(state.n_tail, dtype=np.int64), state.tail_nnz)
+        tail_keep = state.tail_alive[tail_row]
+        old_rows = np.concatenate([state.base_rows[base_keep].astype(np.int64), state.n_base + tail_row[tail_keep]])
+        terms = np.concatenate([base_terms[base_keep], np.asarray(state.tail_terms)[tail_keep]])
+        tf = np.concatenate([state.base_tf[base_keep], np.asarray(state.tail_tf)[tail_keep]])
+
+        # new rows in interaction id order
+        live = np.concatenate([np.flatnonzero(state.base_alive), state.n_base + np.flatnonzero(state.tail_alive)])
+        docs = np.concatenate([state.base_docs, state.tail_docs])[live]
+        order = np.argsort(docs, kind="stable")
+        renumber = np.empty(state.n, dtype=np.int64)
+        renumber[live[order]] = np.arange(len(live))
+        rows = renumber[old_rows].astype(np.int32)
+
+        perm = np.argsort((terms.astype(np.int64) << 32) | rows, kind="stable")
+        terms, rows, tf = terms[perm], rows[perm], tf[perm]
+        indptr = np.zeros(slots + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=slots), out=indptr[1:])
+        val = _tf_weight(tf) * _idf(np.diff(indptr), len(live))[terms]
+        norms = np.sqrt(np.bincount(rows, val * val, minlength=len(live))).astype(np.float32)
+        val /= norms[rows]
+        maxval = np.zeros(slots, dtype=np.float32)
+        nonempty = np.flatnonzero(np.diff(indptr))
+        if len(nonempty):
+            maxval[nonempty] = np.maximum.reduceat(val, indptr[nonempty])
+        hcp = np.concatenate([state.base_hcp, state.tail_hcp])[live][order]
+
+        gen = state.generation + 1
+        arrays = {
+            "indptr": indptr, "rows": rows, "tf": tf, "val": val, "maxval": maxval,
+            "docs": docs[order], "hcp": hcp, "byhcp": np.argsort(hcp, kind="stable"),
+            "stamp": np.concatenate([state.base_stamp, state.tail_stamp])[live][order],
+        }
+        for name, arr in arrays.items():
+            with open(self._file(f"base-{gen}-{name}.npy"), "wb") as f:
+                np.save(f, arr)
+                f.flush()
+                os.fsync(f.fileno())
+        meta = dict(state.meta, generation=gen, base_rows=len(live), tail_rows=0, tail_nnz=0)
+        self._write_meta(meta)
+        self._load(meta)
+        for name in os.listdir(self.path):
+            if name.startswith(("base-", "tail-")) and not name.startswith((f"base-{gen}-", f"tail-{gen}.")):
+                os.unlink(self._file(name))
+
+    def stats(self) -> dict:
+        state = self.state()
+        return {
+            "notes": len(self),
+            "generation": state.generation,
+            "base_rows": state.n_base,
+            "tail_rows": state.n_tail,
+            "hash_bits": state.hash_bits,
+            "bytes": sum(os.path.getsize(self._file(n)) for n in os.listdir(self.path)) if os.path.isdir(self.path) else 0,
+        }
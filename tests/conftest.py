@@ -0,0 +1,52 @@
+# backend/tests/conftest.py
+"""
+Shared fixtures. Tests run against a throwaway SQLite database with the
+mock processor; no .env, Groq key or PostgreSQL is needed.
+
+    python -m pytest
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["GROQ_API_KEY"] = ""  # before main reads it: always the mock processor
+# main opens the similarity index at import; keep it out of the working tree
+os.environ["SIMILARITY_INDEX_DIR"] = os.path.join(tempfile.mkdtemp(prefix="crm-similar-"), "similarity_index")
+
+import main  # noqa: E402
+import migrations  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def settings(tmp_path_factory):
+    """One database per test run (main serves a single database per process)."""
+    s = main.Settings(database_url=f"sqlite:///{tmp_path_factory.mktemp('db') / 'crm.db'}")
+    main.configure_database(s)
+    migrations.upgrade(main.engine, main.Base.metadata, log=lambda line: None)
+    return s
+
+
+@pytest.fixture
+def db(settings):
+    session = main.SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def client(settings):
+    from fastapi.testclient import TestClient
+
+    with TestClient(main.create_app(settings)) as c:
+        yield c
+
+
+def add_interactions(db, count: int, **fields):
+    fields = {"rep_id": "rep_test", "mode": "form", "raw_text": "Discussed dosing", **fields}
+    rows = [main.Interaction(**fields) for _ in range(count)]
+    db.add_all(rows)
+    db.commit()
+    return [r.id for r in rows]
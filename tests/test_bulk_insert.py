@@ -0,0 +1,36 @@
+# backend/tests/test_bulk_insert.py
+import main
+
+
+def count_hcps(db, names):
+    return db.execute(main.select(main.func.count(main.HCP.id)).where(main.HCP.name.in_(names))).scalar()
+
+
+def test_constraint_violation_fails_only_its_row(db):
+    rows = [{"name": "Bulk A"}, {"name": None}, {"name": "Bulk C"}]
+    out = main._insert_rows(db, main.HCP, rows)
+    assert isinstance(out[0], int) and isinstance(out[2], int)
+    assert isinstance(out[1], main.IntegrityError)
+    db.commit()
+    assert count_hcps(db, ["Bulk A", "Bulk C"]) == 2
+
+
+def test_nothing_is_committed_before_the_caller_commits(db):
+    out = main._insert_rows(db, main.HCP, [{"name": "Rolled back A"}, {"name": None}, {"name": "Rolled back B"}])
+    assert sum(isinstance(i, int) for i in out) == 2
+    db.rollback()
+    assert count_hcps(db, ["Rolled back A", "Rolled back B"]) == 0
+
+
+def test_import_endpoint_reports_per_row_results(client):
+    resp = client.post("/v1/hcps:import", json=[{"name": "Imported 1"}, {"speciality": "no name"}, {"name": "Imported 2"}])
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["received"], body["inserted"], body["failed"]) == (3, 2, 1)
+    assert [("id" in r) for r in body["results"]] == [True, False, True]
+
+
+def test_clean_chunk_is_not_committed_by_its_savepoint(db):
+    main._insert_rows(db, main.HCP, [{"name": "Clean A"}, {"name": "Clean B"}])
+    db.rollback()
+    assert count_hcps(db, ["Clean A", "Clean B"]) == 0
@@ -0,0 +1,164 @@
+# backend/tests/test_changes.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from conftest import add_interactions
+
+
+def pending(db) -> int:
+    db.rollback()  # a fresh snapshot
+    return db.execute(main.select(main.func.count()).where(main.ChangeLog.seq.is_(None))).scalar()
+
+
+def wait_sequenced(db, timeout=5.0):
+    """Until the background sequencer has caught up with every commit."""
+    deadline = time.monotonic() + timeout
+    while pending(db):
+        assert time.monotonic() < deadline, "change_log rows were not sequenced"
+        time.sleep(0.01)
+
+
+def changes(client, **params):
+    wait_sequenced(main.SessionLocal())
+    resp = client.get("/v1/changes", params=params)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def head(client) -> str:
+    return changes(client, since="now")["cursor"]
+
+
+def test_sequencer_thread_sequences_commits(db, monkeypatch):
+    threads = set()
+    sequence = main.sequence_changes
+
+    def recording(*args, **kwargs):
+        threads.add(threading.current_thread().name)
+        return sequence(*args, **kwargs)
+
+    monkeypatch.setattr(main, "sequence_changes", recording)
+    add_interactions(db, 3)
+    wait_sequenced(db)
+    assert threads == {"change-sequencer"}
+
+
+def test_commit_does_not_wait_for_the_sequencer(db, monkeypatch):
+    release = threading.Event()
+    sequence = main.sequence_changes
+
+    def stuck(*args, **kwargs):
+        release.wait(5)
+        return sequence(*args, **kwargs)
+
+    monkeypatch.setattr(main, "sequence_changes", stuck)
+    started = time.monotonic()
+    add_interactions(db, 1)
+    assert time.monotonic() - started < 1
+    release.set()
+    wait_sequenced(db)
+
+
+def test_cursor_pages_through_new_changes(client, db):
+    cursor = head(client)
+    ids = add_interactions(db, 3)
+    page = changes(client, since=cursor, limit=2)
+    assert [c["id"] for c in page["changes"]] == ids[:2]
+    assert page["has_more"]
+    assert page["changes"][0]["op"] == "create"
+    assert page["changes"][0]["data"]["rep_id"] == "rep_test"
+    page = changes(client, since=page["cursor"], limit=2)
+    assert [c["id"] for c in page["changes"]] == ids[2:]
+    assert not page["has_more"]
+    assert changes(client, since=page["cursor"])["changes"] == []
+
+
+def test_since_now_skips_history(client, db):
+    add_interactions(db, 1)
+    page = changes(client, since="now")
+    assert page["changes"] == [] and not page["has_more"]
+
+
+def test_entity_changed_twice_appears_once(client, db):
+    cursor = head(client)
+    [interaction_id] = add_interactions(db, 1)
+    interaction = db.get(main.Interaction, interaction_id)
+    interaction.summary = "edited"
+    db.commit()
+    page = changes(client, since=cursor)
+    assert [(c["id"], c["op"]) for c in page["changes"]] == [(interaction_id, "create")]
+    assert page["changes"][0]["data"]["summary"] == "edited"
+
+
+def test_reading_the_feed_does_not_write(client, db, monkeypatch):
+    cursor = head(client)
+    ids = add_interactions(db, 2)
+    wait_sequenced(db)
+
+    def no_writes(*args, **kwargs):
+        raise AssertionError("the read path sequenced changes")
+
+    monkeypatch.setattr(main, "sequence_changes", no_writes)
+    assert [c["id"] for c in changes(client, since=cursor)["changes"]] == ids
+
+
+def test_rolled_back_session_does_not_wake_the_sequencer(db):
+    db.add(main.Interaction(rep_id="rep_test", mode="form", raw_text="never saved"))
+    db.flush()
+    assert db.info["changes_logged"]
+    db.rollback()
+    assert "changes_logged" not in db.info
+
+
+def test_invalid_cursor_is_400(client):
+    assert client.get("/v1/changes", params={"since": "not-a-cursor"}).status_code == 400
+    other = main.base64.urlsafe_b64encode(b"interactions|5").decode()
+    assert client.get("/v1/changes", params={"since": other}).status_code == 400
+
+
+@pytest.fixture
+def pruned(client, db):
+    """A cursor from before a prune, and the ids that survived it."""
+    stale = head(client)
+    add_interactions(db, 2)
+    db.execute(main.update(main.ChangeLog).values(changed_at=datetime.utcnow() - timedelta(days=10)))
+    db.commit()
+    assert main.prune_changes(days=5) > 0
+    kept = add_interactions(db, 2)
+    return stale, kept
+
+
+def test_pruned_cursor_is_410(client, pruned):
+    stale, _ = pruned
+    assert client.get("/v1/changes", params={"since": stale}).status_code == 410
+
+
+def test_omitted_since_starts_at_oldest_retained_change(client, pruned):
+    _, kept = pruned
+    page = changes(client, limit=main.CHANGES_MAX_LIMIT)
+    assert [c["id"] for c in page["changes"]][-2:] == kept
+    assert changes(client, since=page["cursor"])["changes"] == []
+
+
+def test_prune_deletes_a_seq_prefix(client, db):
+    # a long transaction: logged long ago, sequenced after newer changes
+    ids = add_interactions(db, 3)
+    wait_sequenced(db)
+    seqs = dict(db.execute(
+        main.select(main.ChangeLog.entity_id, main.ChangeLog.seq)
+        .where(main.ChangeLog.entity == "interaction", main.ChangeLog.entity_id.in_(ids))
+    ).all())
+    db.execute(main.update(main.ChangeLog).where(main.ChangeLog.seq == seqs[ids[1]])
+               .values(changed_at=datetime.utcnow() - timedelta(days=10)))
+    db.commit()
+    main.prune_changes(days=5)
+    kept = list(db.execute(main.select(main.ChangeLog.seq).order_by(main.ChangeLog.seq)).scalars())
+    assert kept[0] == seqs[ids[1]] + 1
+    assert kept == list(range(kept[0], kept[0] + len(kept)))
+    page = changes(client, since=main.encode_change_cursor(seqs[ids[1]]))
+    assert [c["id"] for c in page["changes"]][:1] == [ids[2]]
+    assert client.get("/v1/changes", params={"since": main.encode_change_cursor(seqs[ids[0]])}).status_code == 410
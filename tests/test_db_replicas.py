@@ -0,0 +1,88 @@
+# backend/tests/test_db_replicas.py
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from db_replicas import STICKY_COOKIE, Replica, ReplicaSet, StickyWritesMiddleware, sticky
+
+
+@pytest.fixture
+def app_client():
+    app = FastAPI()
+
+    @app.get("/items")
+    def list_items():
+        return []
+
+    @app.post("/items", status_code=201)
+    def create_item():
+        return {"id": 1}
+
+    @app.post("/items/{item_id}/summary")
+    def summarize(item_id: int):
+        return {"id": item_id}
+
+    @app.delete("/items/{item_id}")
+    def delete_item(item_id: int):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    app.add_middleware(StickyWritesMiddleware, sticky_seconds=5, read_only=["/items/{item_id}/summary"])
+    with TestClient(app) as c:
+        yield c
+
+
+def test_successful_write_sets_cookie(app_client):
+    resp = app_client.post("/items")
+    assert resp.status_code == 201
+    value = resp.cookies.get(STICKY_COOKIE)
+    assert value is not None and sticky(value)
+    assert float(value) <= time.time() + 5
+    assert "Max-Age=5" in resp.headers["set-cookie"]
+
+
+def test_reads_failed_writes_and_read_only_posts_set_no_cookie(app_client):
+    assert "set-cookie" not in app_client.get("/items").headers
+    assert "set-cookie" not in app_client.delete("/items/7").headers
+    assert "set-cookie" not in app_client.post("/items/7/summary").headers
+
+
+def test_sticky_parses_and_expires():
+    assert sticky("200", now=100)
+    assert not sticky("100", now=100)
+    assert not sticky(None)
+    assert not sticky("garbage")
+
+
+def replica_set(n=2, **options):
+    return ReplicaSet([Replica(f"replica-{i}", create_engine("sqlite://")) for i in range(n)], **options)
+
+
+def test_pick_round_robins_over_healthy_replicas():
+    replicas = replica_set(2)
+    assert [replicas.pick().name for _ in range(4)] == ["replica-0", "replica-1"] * 2
+    replicas.mark_down(replicas.replicas[0], OSError("refused"))
+    assert {replicas.pick().name for _ in range(3)} == {"replica-1"}
+    replicas.mark_down(replicas.replicas[1], OSError("refused"))
+    assert replicas.pick() is None
+
+
+def test_sticky_cookie_reads_from_primary():
+    replicas = replica_set(1)
+    assert replicas.pick(str(time.time() + 5)) is None
+    assert replicas.pick(str(time.time() - 5)).name == "replica-0"
+
+
+def test_check_marks_replicas_down_and_back_up():
+    replicas = replica_set(1)
+    replica = replicas.replicas[0]
+    good = replica.engine
+    replica.engine = create_engine("sqlite:////nonexistent-dir/replica.db")
+    replicas.check()
+    assert not replica.healthy and replica.last_error
+    replica.engine = good
+    replicas.check()
+    assert replica.healthy and replica.last_error is None
+    assert replicas.status()[0]["healthy"]
@@ -0,0 +1,85 @@
+# backend/tests/test_events.py
+import json
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import main
+from conftest import add_interactions
+
+
+def sse_events(client, url):
+    with client.stream("GET", url) as resp:
+        assert resp.status_code == 200
+        return [json.loads(line[5:]) for line in resp.iter_lines() if line.startswith("data:")]
+
+
+@pytest.fixture
+def fast_recheck(monkeypatch):
+    monkeypatch.setattr(main, "SSE_RECHECK_SECONDS", 0.05)
+
+
+def test_stream_ends_at_once_for_processed(client, db):
+    [interaction_id] = add_interactions(db, 1, status="processed", summary="done")
+    events = sse_events(client, f"/v1/interactions/{interaction_id}/events")
+    assert [e["status"] for e in events] == ["processed"]
+
+
+def test_result_without_event_is_picked_up_by_recheck(client, db, fast_recheck):
+    # a worker in another process commits the result; its event never reaches this process
+    [interaction_id] = add_interactions(db, 1)
+
+    def worker():
+        time.sleep(0.2)
+        session = main.SessionLocal()
+        session.execute(
+            main.update(main.Interaction.__table__)
+            .where(main.Interaction.__table__.c.id == interaction_id)
+            .values(status="processed", summary="from the worker", updated_at=datetime.utcnow())
+        )
+        session.commit()
+        session.close()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    events = sse_events(client, f"/v1/interactions/{interaction_id}/events")
+    thread.join()
+    assert [e["status"] for e in events] == ["pending", "processed"]
+    assert events[-1]["summary"] == "from the worker"
+
+
+def test_published_event_is_delivered(client, db, fast_recheck):
+    [interaction_id] = add_interactions(db, 1)
+
+    def publish():
+        time.sleep(0.2)
+        main.publish_interaction_event({"id": interaction_id, "rep_id": "rep_test", "status": "processed", "summary": "pushed"})
+
+    thread = threading.Thread(target=publish)
+    thread.start()
+    events = sse_events(client, f"/v1/interactions/{interaction_id}/events")
+    thread.join()
+    assert events[-1] == {"id": interaction_id, "rep_id": "rep_test", "status": "processed", "summary": "pushed"}
+
+
+def test_permanently_failed_job_ends_the_stream(client, db):
+    [interaction_id] = add_interactions(db, 1)
+    main.enqueue_processing(db, [interaction_id])
+    db.commit()
+    db.execute(
+        main.update(main.ProcessingJob).where(main.ProcessingJob.interaction_id == interaction_id).values(max_attempts=1)
+    )
+    db.commit()
+    claimed = [c for c in main.claim_jobs(db, "w", batch_size=100) if c[1] == interaction_id]
+    job_id, _, token = claimed[0]
+    main.fail_job(db, job_id, token, "GroqError('HTTP 400')")
+
+    [event] = sse_events(client, f"/v1/interactions/{interaction_id}/events")
+    assert event["status"] == "failed" and "HTTP 400" in event["error"]
+    assert main._load_interaction_event(interaction_id)["status"] == "failed"
+
+
+def test_unknown_interaction_is_404(client):
+    assert client.get("/v1/interactions/999999/events").status_code == 404
@@ -0,0 +1,136 @@
+# backend/tests/test_groq_client.py
+import asyncio
+import json
+
+import pytest
+import requests
+
+import groq_client
+from groq_client import GroqClient, GroqError, TokenBucket
+
+
+def response(status: int, body=None, headers=None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = json.dumps(body or {}).encode()
+    resp.headers.update(headers or {})
+    return resp
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def completion(text="ok", total_tokens=10):
+    return {"choices": [{"message": {"content": text}}], "usage": {"total_tokens": total_tokens}}
+
+
+def test_bucket_burst_then_waits_at_rate():
+    bucket = TokenBucket(60)  # 1/sec, burst of 60
+    assert all(bucket.reserve() == 0 for _ in range(60))
+    assert bucket.reserve() == pytest.approx(1.0, abs=0.05)
+    assert bucket.reserve() == pytest.approx(2.0, abs=0.05)
+
+
+def test_disabled_bucket_never_waits():
+    bucket = TokenBucket(0)
+    assert bucket.reserve(10 ** 6) == 0
+
+
+def test_pause_holds_callers():
+    bucket = TokenBucket(600)
+    bucket.pause(3)
+    assert bucket.reserve() == pytest.approx(3, abs=0.05)
+
+
+def test_quota_is_split_across_processes():
+    client = GroqClient(api_key="k", requests_per_minute=30, tokens_per_minute=15000, quota_processes=3)
+    assert client.request_bucket.per_minute == 10
+    assert client.token_bucket.per_minute == 5000
+
+
+@pytest.mark.parametrize("value, seconds", [("3", 3), ("7.66s", 7.66), ("2m59.5s", 179.5), ("120ms", 0.12), ("soon", None)])
+def test_parse_duration(value, seconds):
+    assert groq_client._parse_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
+
+
+def test_retries_429_honouring_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(groq_client.time, "sleep", sleeps.append)
+    client = GroqClient(api_key="k", requests_per_minute=0, tokens_per_minute=0, backoff_base=0)
+    client._session = FakeSession([response(429, headers={"retry-after": "2"}), response(200, completion("hi"))])
+
+    assert client.chat("s", "u")["text"] == "hi"
+    assert client._session.calls == 2
+    assert sleeps == [2.0]
+    assert client.request_bucket.paused_until > 0
+
+
+def test_gives_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(groq_client.time, "sleep", lambda s: None)
+    client = GroqClient(api_key="k", requests_per_minute=0, tokens_per_minute=0, max_retries=2)
+    client._session = FakeSession([response(503)] * 3)
+
+    with pytest.raises(GroqError) as e:
+        client.chat("s", "u")
+    assert e.value.status_code == 503
+    assert client._session.calls == 3
+
+
+def test_client_errors_are_not_retried():
+    client = GroqClient(api_key="k", requests_per_minute=0, tokens_per_minute=0)
+    client._session = FakeSession([response(400)])
+    with pytest.raises(requests.HTTPError):
+        client.chat("s", "u")
+    assert client._session.calls == 1
+
+
+def test_token_bucket_charged_with_reported_usage():
+    client = GroqClient(api_key="k", requests_per_minute=0, tokens_per_minute=6000)
+    client._session = FakeSession([response(200, completion(total_tokens=1000))])
+    client.chat("s", "u", max_tokens=100)
+    assert client.token_bucket.tokens == pytest.approx(5000, abs=1)
+
+
+@pytest.mark.skipif(groq_client.httpx is None, reason="httpx not installed")
+def test_async_client_closed_with_its_loop():
+    client = GroqClient(api_key="k")
+
+    async def use():
+        http, _ = client._async_primitives()
+        await client.aclose()
+        return http
+
+    first = asyncio.run(use())
+    assert first.is_closed and client._async_client is None
+    second = asyncio.run(use())
+    assert second is not first and second.is_closed
+
+
+@pytest.mark.skipif(groq_client.httpx is None, reason="httpx not installed")
+def test_switching_loops_closes_the_previous_client():
+    import threading
+
+    client = GroqClient(api_key="k")
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        async def primitives():
+            return client._async_primitives()[0]
+
+        old = asyncio.run_coroutine_threadsafe(primitives(), other).result(5)
+        new = asyncio.run(primitives())
+        assert new is not old
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), other).result(5)
+        assert old.is_closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(5)
+        other.close()
@@ -0,0 +1,122 @@
+# backend/tests/test_hcp_roster.py
+import pytest
+
+from hcp_roster import RosterCache, RosterSnapshot, decode_cursor, encode_cursor, etag_matches, normalize
+
+ROWS = [
+    (1, "Dr. Anna Smith", "Cardiology", "St Mary Hospital"),
+    (2, "Dr. Jürgen Müller", "Oncology", "Charité"),
+    (3, "Smithers Clinic Lead", "General Practice", "Smithfield Clinic"),
+    (4, "Dr. Bob Jones", "Cardiology", "Smith & Partners"),
+    (5, "Dr. Carla Diaz", "Paediatrics", "City Hospital"),
+    (6, "Dr. Anna Smith", "Neurology", "Royal Infirmary"),
+]
+
+
+@pytest.fixture
+def snap():
+    return RosterSnapshot(ROWS, (len(ROWS), 6))
+
+
+def ids(rows):
+    return [r.id for r in rows]
+
+
+def test_normalize_strips_accents_and_case():
+    assert normalize("Jürgen MÜLLER") == "jurgen muller"
+    assert normalize(None) == ""
+
+
+def test_rows_are_sorted_by_name_then_id(snap):
+    assert ids(snap.rows) == [1, 6, 4, 5, 2, 3]
+    assert len(snap) == 6
+
+
+def test_pages_cover_every_row_once(snap):
+    seen, after = [], None
+    while True:
+        rows, after = snap.page(4, after)
+        seen += ids(rows)
+        if after is None:
+            break
+    assert seen == ids(snap.rows)
+
+
+def test_exact_last_page_has_no_cursor(snap):
+    rows, after = snap.page(6)
+    assert len(rows) == 6 and after is None
+
+
+def test_page_cursor_survives_encoding(snap):
+    _, after = snap.page(2)
+    rows, _ = snap.page(2, decode_cursor(encode_cursor(after)))
+    assert ids(rows) == [4, 5]
+
+
+def test_invalid_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_search_ranks_whole_name_prefix_first(snap):
+    assert ids(snap.search("dr anna")) == [1, 6]
+    # "Smithers ..." starts with the prefix; then name words, then organisations
+    assert ids(snap.search("smith")) == [3, 1, 6, 4]
+
+
+def test_search_needs_every_query_word(snap):
+    assert ids(snap.search("smith cardio")) == [1, 4]
+    assert snap.search("smith oncology") == []
+
+
+def test_search_matches_accent_free_and_case_insensitive(snap):
+    assert ids(snap.search("MULL")) == [2]
+    assert ids(snap.search("charite")) == [2]
+
+
+def test_search_stops_at_limit(snap):
+    assert ids(snap.search("dr", limit=3)) == [1, 6, 4]
+    assert snap.search("   ") == []
+
+
+def test_etag_matches_weak_and_lists(snap):
+    assert etag_matches(snap.etag, snap.etag)
+    assert etag_matches('"other", ' + snap.etag[2:], snap.etag)
+    assert etag_matches("*", snap.etag)
+    assert not etag_matches('W/"hcps-1-1"', snap.etag)
+    assert not etag_matches(None, snap.etag)
+
+
+def test_cache_reloads_only_when_version_moves():
+    cache = RosterCache(ttl=60)
+    version = [(1, 1)]
+    rows = [ROWS[:1]]
+    snap = cache.get(lambda: version[0], lambda: rows[0])
+    assert cache.get(lambda: version[0], lambda: rows[0]) is snap
+
+    cache.invalidate()
+    assert cache.get(lambda: version[0], lambda: rows[0]) is snap
+    assert cache.loads == 1
+
+    version[0], rows[0] = (2, 2), ROWS[:2]
+    cache.invalidate()
+    assert ids(cache.get(lambda: version[0], lambda: rows[0]).rows) == [1, 2]
+    assert cache.loads == 2
+
+
+def test_list_endpoint_pages_and_revalidates(client):
+    for name in ("Dr. Roster Page A", "Dr. Roster Page B", "Dr. Roster Page C"):
+        assert client.post("/v1/hcps", json={"name": name}).status_code == 201
+    seen, cursor = [], None
+    while True:
+        resp = client.get("/v1/hcps", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        seen += [h["id"] for h in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) >= 3
+    etag = resp.headers["ETag"]
+    assert client.get("/v1/hcps", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/v1/hcps", params={"cursor": "bad"}).status_code == 400
+    assert [h["name"] for h in client.get("/v1/hcps/search", params={"prefix": "roster page b"}).json()] == ["Dr. Roster Page B"]
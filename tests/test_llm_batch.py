@@ -0,0 +1,26 @@
+# backend/tests/test_llm_batch.py
+import json
+
+import main
+from conftest import add_interactions
+
+
+def test_batch_results_store_raw_like_single_path(db, monkeypatch):
+    ids = add_interactions(db, 3)
+    answered = ids[:2]
+    raw = {"id": "cmpl-1", "model": "stub-model", "usage": {"total_tokens": 42}}
+    text = json.dumps([{"id": i, "summary": f"note {i}", "topics": ["dosing"], "sentiment": "positive"} for i in answered])
+    monkeypatch.setattr(main, "cached_groq_chat", lambda **kw: {"raw": raw, "text": text, "cache_hit": False})
+
+    retry = main.process_batch_with_groq(ids, token_budget=10 ** 6, retry=False)
+    assert retry == [ids[2]]
+
+    db.expire_all()
+    for i in answered:
+        inter = db.get(main.Interaction, i)
+        assert inter.status == "processed"
+        assert inter.llm_meta["raw_archived"] is True
+        assert inter.llm_meta["batch_size"] == 3 and inter.llm_meta["model"] == "stub-model"
+        assert main.load_llm_raw(db, inter) == raw
+        assert db.get(main.InteractionLlmRaw, i).model == "stub-model"
+    assert db.get(main.InteractionLlmRaw, ids[2]) is None
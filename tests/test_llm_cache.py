@@ -0,0 +1,60 @@
+# backend/tests/test_llm_cache.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import llm_cache
+import main
+
+
+def test_cache_key_ignores_whitespace_only_changes():
+    a = llm_cache.cache_key("m", "sys", "Discussed  dosing\n", 0.0, 256)
+    b = llm_cache.cache_key("m", "sys", " Discussed dosing", 0.0, 256)
+    assert a == b
+    assert a != llm_cache.cache_key("m", "sys", "Discussed dosing", 0.2, 256)
+
+
+def test_lru_evicts_least_recent_and_expires():
+    cache = llm_cache.LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    cache.set("d", 4, ttl_seconds=-1)
+    assert cache.get("d") is None
+    assert cache.stats()["evictions"] >= 1
+
+
+@pytest.fixture
+def cache_table(db):
+    db.execute(main.delete(main.LlmCacheEntry))
+    db.commit()
+    main._db_cache_hits.clear()
+    return db
+
+
+def test_db_hits_are_reads_and_counted_in_batches(cache_table, monkeypatch):
+    db = cache_table
+    main._db_cache_put(db, "k1", "m", {"raw": {}, "text": "cached"})
+    writes = []
+    monkeypatch.setattr(db, "commit", lambda: writes.append(1))
+    assert main._db_cache_get(db, "k1")["text"] == "cached"
+    assert main._db_cache_get(db, "k1")["text"] == "cached"
+    assert writes == [] and main._db_cache_hits == {"k1": 2}
+    monkeypatch.undo()
+    db.rollback()
+
+    main.prune_llm_cache(db)
+    assert db.get(main.LlmCacheEntry, "k1").hit_count == 2
+    assert main._db_cache_hits == {}
+
+
+def test_expired_rows_are_misses_and_pruned(cache_table):
+    db = cache_table
+    db.add(main.LlmCacheEntry(key="old", model="m", response={"text": "x"}, expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.add(main.LlmCacheEntry(key="new", model="m", response={"text": "y"}, expires_at=datetime.utcnow() + timedelta(hours=1)))
+    db.commit()
+    assert main._db_cache_get(db, "old") is None
+    assert main.prune_llm_cache(db) == 1
+    assert [k for (k,) in db.execute(main.select(main.LlmCacheEntry.key))] == ["new"]
@@ -0,0 +1,91 @@
+# backend/tests/test_llm_routing.py
+import asyncio
+
+import pytest
+import requests
+
+from groq_client import GroqError
+from llm_routing import CLOSED, OPEN, CircuitBreaker, ModelRouter, counts_as_failure
+
+
+def http_error(status: int) -> requests.HTTPError:
+    resp = requests.Response()
+    resp.status_code = status
+    return requests.HTTPError(f"HTTP {status}", response=resp)
+
+
+def router(**options) -> ModelRouter:
+    return ModelRouter(["m1"], min_calls=2, error_rate=0.5, **options)
+
+
+def raising(exc):
+    def fn(model):
+        raise exc
+    return fn
+
+
+@pytest.mark.parametrize("exc", [
+    GroqError("HTTP 503", 503),
+    GroqError("HTTP 429", 429),
+    GroqError("request failed: connection reset"),
+    http_error(500),
+    requests.ConnectionError("refused"),
+    requests.Timeout("read timed out"),
+    TimeoutError(),
+])
+def test_outages_count_as_failures(exc):
+    assert counts_as_failure(exc)
+
+
+@pytest.mark.parametrize("exc", [
+    http_error(400),
+    http_error(401),
+    GroqError("HTTP 404", 404),
+    ValueError("GROQ_API_KEY not set in environment"),
+    KeyError("choices"),
+])
+def test_client_errors_do_not_count(exc):
+    assert not counts_as_failure(exc)
+
+
+def test_client_errors_keep_the_breaker_closed():
+    r = router()
+    for _ in range(5):
+        with pytest.raises(requests.HTTPError):
+            r.call(raising(http_error(400)))
+    assert r.breakers["m1"].state == CLOSED
+    assert r.snapshot()["models"][0]["error_rate"] == 0.0
+
+
+def test_server_errors_open_the_breaker():
+    r = router()
+    for _ in range(2):
+        with pytest.raises(GroqError):
+            r.call(raising(GroqError("HTTP 502", 502)))
+    assert r.breakers["m1"].state == OPEN
+
+
+def test_async_client_errors_keep_the_breaker_closed():
+    r = router()
+
+    async def bad_request(model):
+        raise GroqError("HTTP 422", 422)
+
+    async def run():
+        for _ in range(5):
+            with pytest.raises(GroqError):
+                await r.acall(bad_request)
+
+    asyncio.run(run())
+    assert r.breakers["m1"].state == CLOSED
+
+
+def test_half_open_probe_with_a_client_error_closes_the_breaker():
+    breaker = CircuitBreaker("m1", min_calls=1, open_seconds=0)
+    breaker.record(breaker.acquire(), False, 0.1)
+    assert breaker.state == OPEN
+    r = ModelRouter(["m1"])
+    r.breakers["m1"] = breaker
+    with pytest.raises(requests.HTTPError):
+        r.call(raising(http_error(400)))
+    assert breaker.state == CLOSED
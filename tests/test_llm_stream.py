@@ -0,0 +1,72 @@
+# backend/tests/test_llm_stream.py
+import json
+
+import pytest
+
+from llm_stream import PartialJsonObject
+
+FINAL = {"summary": "Met Dr. X about insulin \"pens\"", "topics": ["insulin", "pens"], "sentiment": "positive", "score": -1.5, "ok": True}
+
+
+def fed(*chunks):
+    p = PartialJsonObject()
+    for chunk in chunks:
+        p.feed(chunk)
+    return p
+
+
+def test_docstring_example():
+    p = fed('```json\n{"summary": "Met Dr. X ab')
+    assert p.snapshot() == {"summary": "Met Dr. X ab"}
+    p.feed('out insulin", "topics": ["insulin", "tri')
+    assert p.snapshot() == {"summary": "Met Dr. X about insulin", "topics": ["insulin"]}
+
+
+def test_nothing_before_the_brace():
+    assert fed("Sure, here is").snapshot() is None
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ('{"summary"', {}),
+    ('{"summary":', {}),
+    ('{"summary": "a", ', {"summary": "a"}),
+    ('{"score": -1.', {}),
+    ('{"score": -1.5', {}),  # a number may still grow
+    ('{"score": -1.5,', {"score": -1.5}),
+    ('{"ok": tr', {}),
+    ('{"s": "a\\', {"s": "a"}),  # dangling escape
+    ('{"s": "caf\\u00', {"s": "caf"}),  # unfinished \\u escape
+    ('{"s": "caf\\u00e9', {"s": "café"}),
+    ('{"topics": ["a", "b', {"topics": ["a"]}),
+    ('{"nested": {"k": [1, {"x": "y', {"nested": {"k": [1, {"x": "y"}]}}),
+])
+def test_partial_prefixes(prefix, expected):
+    assert fed(prefix).snapshot() == expected
+
+
+def test_every_prefix_is_a_prefix_of_the_final_object():
+    text = "```json\n" + json.dumps(FINAL) + "\n``` trailing prose {}"
+    p = PartialJsonObject()
+    for c in text:
+        p.feed(c)
+        snap = p.snapshot()
+        if snap is None:
+            continue
+        for key, value in snap.items():
+            assert key in FINAL
+            if isinstance(value, str):
+                assert FINAL[key].startswith(value)
+            elif isinstance(value, list):
+                assert FINAL[key][:len(value)] == value
+            else:
+                assert value == FINAL[key]
+    assert p.complete and p.snapshot() == FINAL
+
+
+def test_chunking_does_not_matter():
+    text = json.dumps(FINAL)
+    one = fed(text)
+    many = fed(*[text[i:i + 3] for i in range(0, len(text), 3)])
+    assert one.snapshot() == many.snapshot() == FINAL
+    many.feed('{"ignored": 1}')
+    assert many.snapshot() == FINAL
@@ -0,0 +1,130 @@
+# backend/tests/test_process_stream.py
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import main
+
+
+def stream(client, interaction_id):
+    with client.stream("POST", f"/v1/interactions/{interaction_id}/process/stream") as resp:
+        assert resp.status_code == 200
+        return [json.loads(line[5:]) for line in resp.iter_lines() if line.startswith("data:")]
+
+
+def create(client):
+    resp = client.post("/v1/interactions", json={"rep_id": "rep_test", "mode": "chat", "raw_text": "Interested in the pump"})
+    return resp.json()["id"]
+
+
+def jobs(db, interaction_id):
+    db.expire_all()
+    return db.execute(main.select(main.ProcessingJob).where(main.ProcessingJob.interaction_id == interaction_id)).scalars().all()
+
+
+def wait_for_job(db, interaction_id, status, timeout=5.0):
+    """The stream finishes its job in a thread after the response ends."""
+    deadline = time.monotonic() + timeout
+    while True:
+        [job] = jobs(db, interaction_id)
+        if job.status == status or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+
+def test_stream_takes_over_the_queued_job(client, db):
+    interaction_id = create(client)
+    [job] = jobs(db, interaction_id)
+    assert job.status == "queued"
+
+    events = stream(client, interaction_id)
+    assert events[-1]["status"] == "processed"
+    job = wait_for_job(db, interaction_id, "done")
+    assert job.status == "done" and job.attempts == 1
+
+
+def test_stream_finishes_the_job_off_the_event_loop(client, monkeypatch):
+    interaction_id = create(client)
+    loop_thread, finished = [], threading.Event()
+    finish = main._finish_interaction_job
+
+    async def fake_stream(interaction_id, user_prompt):
+        loop_thread.append(threading.get_ident())
+        yield {"id": interaction_id, "status": "processed"}
+
+    def recording(job, processed):
+        finish(job, processed)
+        finished.thread = threading.get_ident()
+        finished.set()
+
+    monkeypatch.setattr(main, "astream_process_interaction", fake_stream)
+    monkeypatch.setattr(main, "_finish_interaction_job", recording)
+    assert stream(client, interaction_id) == [{"id": interaction_id, "status": "processed"}]
+    assert finished.wait(5)
+    assert finished.thread != loop_thread[0]
+
+
+def test_stream_follows_a_job_a_worker_is_running(client, db, monkeypatch):
+    monkeypatch.setattr(main, "SSE_RECHECK_SECONDS", 0.05)
+    interaction_id = create(client)
+    db.execute(
+        main.update(main.ProcessingJob).where(main.ProcessingJob.interaction_id == interaction_id)
+        .values(status="running", locked_by="worker", locked_until=datetime.utcnow() + timedelta(minutes=1))
+    )
+    db.commit()
+    processed = []
+    monkeypatch.setattr(main, "astream_process_interaction", lambda *a: processed.append(a))
+
+    def worker():
+        time.sleep(0.2)
+        main.mock_process_interaction(interaction_id)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    events = stream(client, interaction_id)
+    thread.join()
+    assert processed == []
+    assert [e["status"] for e in events] == ["pending", "processed"]
+
+
+def test_unfinished_claim_goes_back_to_the_queue(db, client):
+    interaction_id = create(client)
+    state, job = main._claim_interaction_job(interaction_id)
+    assert state == "claimed"
+    assert main._claim_interaction_job(interaction_id) == ("running", None)
+    main._finish_interaction_job(job, processed=False)
+    [row] = jobs(db, interaction_id)
+    assert (row.status, row.attempts, row.locked_by) == ("queued", 0, None)
+
+
+def test_process_endpoint_claims_the_job(client, db):
+    interaction_id = create(client)
+    assert client.post(f"/v1/interactions/{interaction_id}/process").json()["status"] == "processed"
+    assert [j.status for j in jobs(db, interaction_id)] == ["done"]
+
+
+def test_worker_skips_already_processed(client, db, monkeypatch):
+    pending, done = create(client), create(client)
+    main.mock_process_interaction(done)
+    calls = []
+    monkeypatch.setattr(main, "process_interaction", lambda i, interactive=False: calls.append(i))
+    main.process_interactions([pending, done])
+    assert calls == [pending]
+
+
+def test_process_endpoint_leaves_a_running_job_alone(client, db, monkeypatch):
+    interaction_id = create(client)
+    db.execute(
+        main.update(main.ProcessingJob).where(main.ProcessingJob.interaction_id == interaction_id)
+        .values(status="running", locked_by="worker", locked_until=datetime.utcnow() + timedelta(minutes=1))
+    )
+    db.commit()
+    calls = []
+    monkeypatch.setattr(main, "process_interaction", lambda *a, **kw: calls.append(a))
+    resp = client.post(f"/v1/interactions/{interaction_id}/process")
+    assert resp.status_code == 202
+    assert resp.json() == {"id": interaction_id, "status": "running"}
+    assert calls == []
+    [job] = jobs(db, interaction_id)
+    assert (job.status, job.locked_by) == ("running", "worker")
@@ -0,0 +1,98 @@
+# backend/tests/test_queue.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from conftest import add_interactions
+
+
+@pytest.fixture
+def queue(db):
+    db.execute(main.delete(main.ProcessingJob))
+    db.commit()
+    return db
+
+
+def job(db, job_id):
+    db.expire_all()
+    return db.get(main.ProcessingJob, job_id)
+
+
+def test_enqueue_collapses_queued_duplicates(queue):
+    ids = add_interactions(queue, 2)
+    assert main.enqueue_processing(queue, ids + ids) == 2
+    queue.commit()
+    assert main.enqueue_processing(queue, ids) == 0
+
+
+def test_claim_then_complete(queue):
+    ids = add_interactions(queue, 3)
+    main.enqueue_processing(queue, ids)
+    queue.commit()
+
+    claimed = main.claim_jobs(queue, "w1", batch_size=10)
+    assert sorted(i for _, i, _ in claimed) == sorted(ids)
+    assert main.claim_jobs(queue, "w2", batch_size=10) == []
+
+    job_id, _, token = claimed[0]
+    main.complete_job(queue, job_id, token)
+    assert job(queue, job_id).status == "done"
+    assert main.queue_stats(queue)["running"] == 2
+
+
+def test_expired_lease_is_reclaimed_and_stale_token_ignored(queue):
+    [interaction_id] = add_interactions(queue, 1)
+    main.enqueue_processing(queue, [interaction_id])
+    queue.commit()
+    [(job_id, _, first)] = main.claim_jobs(queue, "host:1")
+
+    job(queue, job_id).locked_until = datetime.utcnow() - timedelta(seconds=1)
+    queue.commit()
+    # same worker id: only the token tells the two claims apart
+    [(_, _, second)] = main.claim_jobs(queue, "host:1")
+    assert second != first
+
+    main.complete_job(queue, job_id, first)
+    main.fail_job(queue, job_id, first, "late")
+    assert job(queue, job_id).status == "running"
+    main.complete_job(queue, job_id, second)
+    assert job(queue, job_id).status == "done"
+    assert job(queue, job_id).attempts == 2
+
+
+def test_fail_retries_with_backoff_then_gives_up(queue):
+    [interaction_id] = add_interactions(queue, 1)
+    main.enqueue_processing(queue, [interaction_id])
+    queue.commit()
+    row = queue.execute(main.select(main.ProcessingJob)).scalar_one()
+    row.max_attempts = 2
+    queue.commit()
+
+    [(job_id, _, token)] = main.claim_jobs(queue, "w")
+    main.fail_job(queue, job_id, token, "boom")
+    failed = job(queue, job_id)
+    assert failed.status == "queued" and failed.run_after > datetime.utcnow()
+    assert main.claim_jobs(queue, "w") == []
+
+    failed.run_after = datetime.utcnow()
+    queue.commit()
+    [(_, _, token)] = main.claim_jobs(queue, "w")
+    main.fail_job(queue, job_id, token, "boom again")
+    assert job(queue, job_id).status == "failed"
+    assert job(queue, job_id).last_error == "boom again"
+
+
+def test_prune_jobs_keeps_recent_and_unfinished(queue):
+    ids = add_interactions(queue, 3)
+    main.enqueue_processing(queue, ids)
+    queue.commit()
+    claimed = main.claim_jobs(queue, "w", batch_size=2)
+    for job_id, _, token in claimed:
+        main.complete_job(queue, job_id, token)
+    old = job(queue, claimed[0][0])
+    old.updated_at = datetime.utcnow() - timedelta(days=10)
+    queue.commit()
+
+    assert main.prune_jobs(queue, days=7) == 1
+    assert queue.execute(main.select(main.func.count(main.ProcessingJob.id))).scalar() == 2
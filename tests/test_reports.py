@@ -0,0 +1,54 @@
+# backend/tests/test_reports.py
+from datetime import datetime, timedelta
+
+import main
+from conftest import add_interactions
+
+
+def rollup(db):
+    db.expire_all()
+    return {tuple(getattr(r, k) for k in main.REPORT_KEY): r.count for r in db.query(main.InteractionDaily) if r.count}
+
+
+def add_hcp(db, name):
+    hcp = main.HCP(name=name)
+    db.add(hcp)
+    db.commit()
+    return hcp.id
+
+
+def test_incremental_rollup_matches_rebuild(db):
+    # baseline: other tests change rows with core updates, which skip the flush hooks
+    main.rebuild_reports(db)
+    hcp_id = add_hcp(db, "Dr. Rollup")
+    ids = add_interactions(db, 3, rep_id="rep_rollup", hcp_id=hcp_id)
+    older = add_interactions(db, 2, rep_id="rep_rollup_2", created_at=datetime.utcnow() - timedelta(days=3))
+    for interaction_id in ids + older[:1]:
+        main.mock_process_interaction(interaction_id)
+
+    # reprocess with different notes: pending, then processed with a new sentiment
+    main._edit_interaction(db, ids[0], {"raw_text": "Not interested, concerns about the price"})
+    main.mock_process_interaction(ids[0])
+    # move one to another rep and off its HCP
+    inter = db.get(main.Interaction, ids[1])
+    inter.rep_id, inter.hcp_id = "rep_rollup_2", None
+    db.commit()
+    for interaction_id in (ids[2], older[1]):
+        db.delete(db.get(main.Interaction, interaction_id))
+        db.commit()
+
+    incremental = rollup(db)
+    main.rebuild_reports(db)
+    assert incremental == rollup(db)
+
+
+def test_report_endpoint_reads_the_rollup(client, db):
+    add_interactions(db, 2, rep_id="rep_report_api")
+    [processed] = add_interactions(db, 1, rep_id="rep_report_api")
+    main.mock_process_interaction(processed)
+    report = client.get("/v1/reports/interactions", params={"group_by": "rep", "rep_id": "rep_report_api"}).json()
+    [group] = report["groups"]
+    assert group["rep_id"] == "rep_report_api"
+    assert group["total"] == 3
+    assert group["status"] == {"pending": 2, "processed": 1}
+    assert client.get("/v1/reports/interactions", params={"group_by": "week"}).status_code == 400
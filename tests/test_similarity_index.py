@@ -0,0 +1,185 @@
+# backend/tests/test_similarity_index.py
+import os
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import main  # noqa: E402
+from conftest import add_interactions  # noqa: E402
+from similarity_index import SimilarityIndex, hash_terms  # noqa: E402
+
+HASH_BITS = 12
+VOCAB = [f"word{i}" for i in range(80)]
+
+
+def make_index(path, **options) -> SimilarityIndex:
+    # max_df=1.0: no common-term skipping, so scores are exact over the whole query
+    return SimilarityIndex(str(path), hash_bits=HASH_BITS, tail_max_rows=10 ** 6, max_df=1.0, **options)
+
+
+def add(index, rows, compact=False):
+    """rows: (doc, hcp, stamp, words); appended in one update."""
+    return index.update(lambda cursor, indexed_stamp: (rows, cursor), compact=compact)
+
+
+def random_notes(n, seed=7):
+    rnd = random.Random(seed)
+    # skewed word frequencies so some terms are common and some rare
+    weights = [1.0 / (i + 1) for i in range(len(VOCAB))]
+    return {
+        doc: (doc % 5, rnd.choices(VOCAB, weights, k=rnd.randint(3, 12)))
+        for doc in range(1, n + 1)
+    }
+
+
+def brute_force(notes, words, k, hcp_id=None, exclude=None):
+    """Exact (doc, cosine) top k with the index's hashing and tf-idf weighting."""
+    slots = 1 << HASH_BITS
+    vectors = {}
+    df = np.zeros(slots)
+    for doc, (_, doc_words) in notes.items():
+        terms, tf = hash_terms(doc_words, HASH_BITS)
+        vectors[doc] = (terms, tf)
+        df[terms] += 1
+    idf = np.log((1.0 + len(notes)) / (1.0 + df)) + 1.0
+
+    def unit(terms, tf):
+        vec = np.zeros(slots)
+        vec[terms] = (1.0 + np.log(tf)) * idf[terms]
+        return vec / np.linalg.norm(vec)
+
+    q = unit(*hash_terms(words, HASH_BITS))
+    scores = []
+    for doc, (hcp, _) in notes.items():
+        if (hcp_id is not None and hcp != hcp_id) or doc == exclude:
+            continue
+        score = float(unit(*vectors[doc]) @ q)
+        if score > 0:
+            scores.append((doc, score))
+    scores.sort(key=lambda item: (-item[1], item[0]))
+    return scores[:k]
+
+
+def assert_matches(got, expected):
+    assert len(got) == len(expected)
+    # ties may order differently; the scores must agree rank by rank and per doc
+    assert [s for _, s in got] == pytest.approx([s for _, s in expected], abs=1e-5)
+
+
+def check(index, notes, queries, k, **filters):
+    for words in queries:
+        got = index.query(words, k=k, **filters)
+        expected = brute_force(notes, words, k, **filters)
+        assert_matches(got, expected)
+        everything = dict(brute_force(notes, words, len(notes), **filters))
+        for doc, score in got:
+            assert score == pytest.approx(everything[doc], abs=1e-5)
+
+
+@pytest.fixture
+def notes():
+    return random_notes(400)
+
+
+@pytest.fixture
+def queries(notes):
+    rnd = random.Random(11)
+    picked = [notes[doc][1] for doc in (1, 17, 250)]
+    return picked + [rnd.sample(VOCAB, 4), ["word0", "word79"], ["word3"]]
+
+
+def rows_of(notes, stamp=1.0):
+    return [(doc, hcp, stamp, words) for doc, (hcp, words) in notes.items()]
+
+
+def test_tail_query_matches_brute_force(tmp_path, notes, queries):
+    index = make_index(tmp_path)
+    assert add(index, rows_of(notes)) == len(notes)
+    assert index.stats()["tail_rows"] == len(notes)
+    check(index, notes, queries, k=10)
+
+
+@pytest.mark.parametrize("k", [1, 10, 50])
+def test_base_query_matches_brute_force(tmp_path, notes, queries, k):
+    index = make_index(tmp_path)
+    add(index, rows_of(notes))
+    index.compact()
+    assert index.stats()["base_rows"] == len(notes)
+    check(index, notes, queries, k=k)
+
+
+def test_filters(tmp_path, notes, queries):
+    index = make_index(tmp_path)
+    half = len(notes) // 2
+    add(index, rows_of({d: notes[d] for d in list(notes)[:half]}))
+    index.compact()
+    add(index, rows_of({d: notes[d] for d in list(notes)[half:]}))  # base and tail both filtered
+    for words in queries:
+        got = index.query(words, k=len(notes), hcp_id=3)
+        assert got and {doc for doc, _ in got} <= {d for d, (hcp, _) in notes.items() if hcp == 3}
+        got = index.query(words, k=len(notes), exclude=17)
+        assert 17 not in {doc for doc, _ in got}
+        got = index.query(words, k=len(notes), exclude=300)
+        assert 300 not in {doc for doc, _ in got}
+
+
+def test_reindexing_supersedes_the_base_row(tmp_path):
+    index = make_index(tmp_path)
+    add(index, [(1, 1, 1.0, ["insulin", "dosing"]), (2, 1, 1.0, ["trial", "enrolment"])])
+    index.compact()
+    # older or equal stamps are skipped
+    assert add(index, [(1, 1, 1.0, ["vaccine", "schedule"])]) == 0
+    assert add(index, [(1, 1, 2.0, ["vaccine", "schedule"])]) == 1
+    assert len(index) == 2
+    assert [doc for doc, _ in index.query(["insulin", "dosing"])] == []
+    assert [doc for doc, _ in index.query(["vaccine"])] == [1]
+    assert index.state().stamp_of(1) == 2.0
+    # a second re-index supersedes the first tail row too
+    add(index, [(1, 1, 3.0, ["trial"])])
+    assert [doc for doc, _ in index.query(["vaccine"])] == []
+    assert {doc for doc, _ in index.query(["trial"])} == {1, 2}
+
+
+def test_compaction_keeps_results_and_drops_dead_rows(tmp_path, notes, queries):
+    index = make_index(tmp_path)
+    add(index, rows_of(notes))
+    index.compact()
+    changed = {doc: (notes[doc][0], ["word5", "word6", "word70"]) for doc in range(1, 41)}
+    add(index, rows_of(changed, stamp=2.0))
+    current = {**notes, **changed}
+    state = index.state()
+    assert state.n_base + state.n_tail == len(notes) + len(changed)
+    before = {tuple(words): {doc for doc, _ in index.query(words, k=len(current))} for words in queries}
+
+    index.compact()
+    stats = index.stats()
+    assert (stats["base_rows"], stats["tail_rows"], stats["notes"]) == (len(current), 0, len(current))
+    assert stats["generation"] == 2
+    assert not [n for n in os.listdir(tmp_path) if n.startswith(("base-1-", "tail-1.", "tail-0."))]
+    for words in queries:
+        assert {doc for doc, _ in index.query(words, k=len(current))} == before[tuple(words)]
+    # idf is refreshed over the live rows, so the result is exact again
+    check(index, current, queries, k=10)
+
+
+def test_a_second_process_sees_committed_rows(tmp_path):
+    writer, reader = make_index(tmp_path), make_index(tmp_path)
+    add(writer, [(1, None, 1.0, ["insulin"])])
+    assert [doc for doc, _ in reader.query(["insulin"])] == [1]
+
+
+def test_similar_endpoint(client, db):
+    words = "glp1 titration nausea hypoglycaemia"
+    first, second = add_interactions(db, 2, status="processed", raw_text=f"Discussed {words} with the team")
+    [other] = add_interactions(db, 1, status="processed", raw_text="Brought lunch, talked about the conference agenda")
+    while main.refresh_similar_index()[1]:
+        pass
+    resp = client.get(f"/v1/interactions/{first}/similar", params={"k": 5})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert results[0]["id"] == second
+    assert first not in [r["id"] for r in results]
+    assert other not in [r["id"] for r in results]
+    assert client.get("/v1/interactions/999999/similar").status_code == 404
@@ -0,0 +1,55 @@
+# backend/tests/test_text_analytics.py
+import json
+
+import pytest
+
+from text_analytics import Lexicon, TextAnalyzer
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return TextAnalyzer()
+
+
+@pytest.mark.parametrize("text, sentiment", [
+    ("Dr. X is interested in the new dosing", "positive"),
+    ("Dr. X is not interested", "negative"),
+    ("No concerns about pricing", "positive"),
+    ("Declined the samples, pricing problem", "negative"),
+    ("Discussed the trial schedule", "neutral"),
+    ("I know she was willing", "neutral"),  # "no" inside "know", "will" inside "willing"
+    ("Never.", "negative"),  # a negator with nothing to flip is a negative cue
+])
+def test_sentiment(analyzer, text, sentiment):
+    assert analyzer.analyze(text).sentiment == sentiment
+
+
+def test_negation_window_is_bounded(analyzer):
+    # "interested" is out of reach: the lone negator (-1) and "interested" (+1) cancel out
+    assert analyzer.analyze("not sure about timing but interested").score == 0
+    assert analyzer.analyze("not really interested").score == -1
+
+
+def test_topics_skip_stopwords_short_words_and_digits(analyzer):
+    topics = analyzer.analyze("Insulin dosing: insulin 20mg, the pump is OK. Insulin!").topics
+    assert topics[0] == "insulin"
+    assert "the" not in topics and "ok" not in topics and not any(t.isdigit() for t in topics)
+    assert len(analyzer.analyze(" ".join(f"word{c}" * 2 for c in "abcdefghij"), max_topics=3).topics) <= 3
+
+
+def test_batch_matches_single(analyzer):
+    notes = ["Great meeting, interested", "not good", "", "Refused samples"]
+    assert analyzer.analyze_batch(notes) == [analyzer.analyze(n) for n in notes]
+
+
+def test_topic_counts(analyzer):
+    counts = analyzer.topic_counts(["insulin pump", "Insulin dosing", "no insulin"])
+    assert counts["insulin"] == 3 and counts["pump"] == 1 and "no" not in counts
+
+
+def test_lexicon_from_file(tmp_path):
+    path = tmp_path / "lexicon.json"
+    path.write_text(json.dumps({"positive": ["keen"], "negative": ["hesitant"]}))
+    custom = TextAnalyzer(Lexicon.from_file(str(path)))
+    assert custom.analyze("very keen").sentiment == "positive"
+    assert custom.analyze("hesitant").sentiment == "negative"
@@ -0,0 +1,76 @@
+# backend/tests/test_trends.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import main
+from conftest import add_interactions
+
+
+def add_hcp(db, name):
+    hcp = main.HCP(name=name)
+    db.add(hcp)
+    db.commit()
+    return hcp.id
+
+
+def trends(db):
+    """hcp_trend rows with interactions, topic scores decayed to now, and non-zero hcp_topic_daily counts."""
+    db.expire_all()
+    now = datetime.utcnow()
+    out = {}
+    for t in db.query(main.HcpTrend):
+        if not t.interaction_count:
+            continue
+        factor = main._decay((now - t.decay_ref).total_seconds())
+        out[t.hcp_id] = {
+            "count": t.interaction_count,
+            "sentiment": {k: v for k, v in (t.sentiment_counts or {}).items() if v},
+            "scores": {k: pytest.approx(v * factor, rel=1e-4) for k, v in (t.topic_scores or {}).items()},
+            "first": t.first_contact_at,
+            "last": t.last_contact_at,
+        }
+    daily = {(r.hcp_id, r.day, r.topic): r.count for r in db.query(main.HcpTopicDaily) if r.count}
+    return out, daily
+
+
+def test_incremental_trends_match_rebuild(db):
+    # baseline: other tests change rows with core updates, which skip the flush hooks
+    main.rebuild_hcp_trends(db)
+    first, second = add_hcp(db, "Dr. Trend One"), add_hcp(db, "Dr. Trend Two")
+    ids = add_interactions(db, 2, hcp_id=first, raw_text="Insulin pump trial, positive feedback")
+    [old] = add_interactions(db, 1, hcp_id=first, raw_text="Declined the sample kit",
+                             created_at=datetime.utcnow() - timedelta(days=20))
+    [moved] = add_interactions(db, 1, hcp_id=first, raw_text="Asked about dosing for elderly patients",
+                               created_at=datetime.utcnow() - timedelta(days=5))
+    for interaction_id in ids + [old, moved]:
+        main.mock_process_interaction(interaction_id)
+
+    # reprocess with new notes
+    main._edit_interaction(db, ids[0], {"raw_text": "Not interested in the pump, concerns about cost"})
+    main.mock_process_interaction(ids[0])
+    # the HCP's first contact moves to another HCP, and its last one is deleted
+    inter = db.get(main.Interaction, old)
+    inter.hcp_id = second
+    db.commit()
+    db.delete(db.get(main.Interaction, ids[1]))
+    db.commit()
+
+    incremental = trends(db)
+    main.rebuild_hcp_trends(db)
+    rebuilt = trends(db)
+    assert incremental[1] == rebuilt[1]
+    assert incremental[0] == rebuilt[0]
+    assert rebuilt[0][second]["count"] == 1
+    assert rebuilt[0][first]["first"] == db.get(main.Interaction, moved).created_at
+
+
+def test_trend_summary_endpoint(client, db):
+    hcp_id = add_hcp(db, "Dr. Trend Summary")
+    for interaction_id in add_interactions(db, 3, hcp_id=hcp_id, raw_text="Glucose monitor demo went well"):
+        main.mock_process_interaction(interaction_id)
+    body = client.post(f"/v1/hcps/{hcp_id}/trend_summary").json()
+    assert body["interaction_count"] == 3
+    assert sorted(body["topics"][:3]) == ["demo", "glucose", "monitor"]  # equal scores: by name
+    assert body["trend_summary"].startswith("Recent topics: demo, glucose, monitor")
+    assert client.post(f"/v1/hcps/{hcp_id}/trend_summary", params={"window_days": 7}).json()["topic_scores"]["glucose"] == 3
@@ -0,0 +1,181 @@
+# backend/text_analytics.py
+"""
+Deterministic text analytics used by the mock processor, trend rebuilds and
+backfills.
+
+Each text is tokenized once (lowercase, punctuation/digits to spaces, split)
+and topics and sentiment are computed from that token list with set/dict
+lookups, so matching is on whole words ("no" does not fire inside "know",
+"will" not inside "willing"). A negator ("not", "no", "never", "don't", ...)
+flips the polarity of the next lexicon word within a small window: "not
+interested" counts as negative, "no concerns" as positive. A negator with
+nothing to flip still counts as a negative cue on its own.
+
+    analyzer = TextAnalyzer()
+    analyzer.analyze("Dr. X is interested, no concerns")    # Analysis(topics=[...], sentiment='positive', score=2)
+    analyzer.analyze_batch(list_of_notes)                   # one Analysis per note
+"""
+import json
+import os
+import string
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+DEFAULT_STOPWORDS = frozenset({
+    "the", "a", "an", "and", "or", "of", "in", "on", "with", "to", "for", "is", "was", "were", "it", "that", "this"
+})
+DEFAULT_POSITIVE = frozenset({"good", "great", "positive", "promising", "interested", "approve", "yes", "will"})
+DEFAULT_NEGATIVE = frozenset({"bad", "negative", "declined", "concern", "concerns", "problem", "refused"})
+DEFAULT_NEGATIONS = frozenset({"not", "no", "never", "none", "nor", "without", "cannot"})
+
+# digits and punctuation become word separators; one C-level translate + split per text
+_SEPARATORS = str.maketrans({c: " " for c in string.punctuation + string.digits + "‘’“”«»–—…•·"})
+
+
+class Analysis(NamedTuple):
+    topics: List[str]
+    sentiment: str
+    score: int
+
+
+class Lexicon:
+    def __init__(
+        self,
+        positive: Iterable[str] = DEFAULT_POSITIVE,
+        negative: Iterable[str] = DEFAULT_NEGATIVE,
+        stopwords: Iterable[str] = DEFAULT_STOPWORDS,
+        negations: Iterable[str] = DEFAULT_NEGATIONS,
+        negation_window: int = 3,
+        min_topic_length: int = 3,
+    ):
+        self.positive = frozenset(w.lower() for w in positive)
+        self.negative = frozenset(w.lower() for w in negative)
+        self.stopwords = frozenset(w.lower() for w in stopwords)
+        self.negations = frozenset(w.lower() for w in negations)
+        self.negation_window = negation_window
+        self.min_topic_length = min_topic_length
+
+    @classmethod
+    def from_file(cls, path: str) -> "Lexicon":
+        """
+        Load a JSON lexicon; missing keys keep their defaults. Example:
+        {"positive": [...], "negative": [...], "stopwords": [...], "negations": [...], "negation_window": 3}
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            positive=data.get("positive", DEFAULT_POSITIVE),
+            negative=data.get("negative", DEFAULT_NEGATIVE),
+            stopwords=data.get("stopwords", DEFAULT_STOPWORDS),
+            negations=data.get("negations", DEFAULT_NEGATIONS),
+            negation_window=int(data.get("negation_window", 3)),
+            min_topic_length=int(data.get("min_topic_length", 3)),
+        )
+
+
+class TextAnalyzer:
+    def __init__(self, lexicon: Optional[Lexicon] = None):
+        self.lexicon = lexicon or Lexicon()
+        lx = self.lexicon
+        # +1 / -1 for polar words, 0 for negators
+        self._polarity: Dict[str, int] = {w: 0 for w in lx.negations}
+        self._polarity.update({w: 1 for w in lx.positive})
+        self._polarity.update({w: -1 for w in lx.negative})
+        self._lexicon_words = frozenset(self._polarity)
+        # negators carry no topic information either
+        self._topic_skip = lx.stopwords | lx.negations
+
+    def tokenize(self, text: str) -> List[str]:
+        if not text:
+            return []
+        # "don't" -> "do not" so contractions negate like the plain word
+        text = text.lower().replace("n't", " not").replace("n’t", " not")
+        return text.translate(_SEPARATORS).split()
+
+    def topics_from_tokens(self, tokens: List[str], max_topics: int = 6) -> List[str]:
+        skip = self._topic_skip
+        min_len = self.lexicon.min_topic_length
+        topics = {}
+        for w in tokens:
+            if len(w) >= min_len and w not in skip and w not in topics:
+                topics[w] = None
+                if len(topics) >= max_topics:
+                    break
+        return list(topics)
+
+    def score_tokens(self, tokens: List[str]) -> int:
+        """Sum of lexicon polarities, with negators flipping the next polar word in the window."""
+        lexicon = self._lexicon_words
+        if lexicon.isdisjoint(tokens):
+            return 0
+        polarity = self._polarity
+        window = self.lexicon.negation_window
+        score = 0
+        negated_at = None  # index of a negator still looking for a word to flip
+        for i, w in enumerate(tokens):
+            if w not in lexicon:
+                continue
+            if negated_at is not None and i - negated_at > window:
+                score -= 1  # too far away: the negator stands on its own
+                negated_at = None
+            p = polarity[w]
+            if p == 0:
+                if negated_at is not None:
+                    score -= 1
+                negated_at = i
+            elif negated_at is not None:
+                score -= p
+                negated_at = None
+            else:
+                score += p
+        if negated_at is not None:
+            score -= 1
+        return score
+
+    @staticmethod
+    def label(score: int) -> str:
+        if score > 0:
+            return "positive"
+        if score < 0:
+            return "negative"
+        return "neutral"
+
+    def analyze(self, text: str, max_topics: int = 6) -> Analysis:
+        tokens = self.tokenize(text)
+        score = self.score_tokens(tokens)
+        return Analysis(self.topics_from_tokens(tokens, max_topics), self.label(score), score)
+
+    def analyze_batch(self, texts: Iterable[str], max_topics: int = 6) -> List[Analysis]:
+        """Analyze many notes in one call; each text is tokenized exactly once."""
+        tokenize, topics_of, score_of, label = self.tokenize, self.topics_from_tokens, self.score_tokens, self.label
+        out = []
+        for text in texts:
+            tokens = tokenize(text)
+            score = score_of(tokens)
+            out.append(Analysis(topics_of(tokens, max_topics), label(score), score))
+        return out
+
+    def content_words(self, text: str) -> List[str]:
+        """Every token that could be a topic (stopwords, negators and short words removed), repeats kept."""
+        skip = self._topic_skip
+        min_len = self.lexicon.min_topic_length
+        return [w for w in self.tokenize(text) if len(w) >= min_len and w not in skip]
+
+    def topic_counts(self, texts: Iterable[str]) -> Counter:
+        """Frequency of topic words across texts (stopwords and short words removed)."""
+        counts: Counter = Counter()
+        for text in texts:
+            counts.update(self.content_words(text))
+        return counts
+
+
+_default: Optional[TextAnalyzer] = None
+
+
+def default_analyzer() -> TextAnalyzer:
+    """Shared analyzer; TEXT_LEXICON_PATH points at an optional JSON lexicon."""
+    global _default
+    if _default is None:
+        path = os.getenv("TEXT_LEXICON_PATH")
+        _default = TextAnalyzer(Lexicon.from_file(path) if path else None)
+    return _default
@@ -0,0 +1,174 @@
+# backend/worker.py
+"""
+Standalone processing worker pool.
+
+Claims jobs from the processing_job table (see main.enqueue_processing) and runs
+the configured processor for each interaction. Scale by adding processes
+(--processes) or threads per process (--threads), or by starting more copies
+of this script on other machines against the same database.
+
+    python worker.py --processes 2 --threads 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from dotenv import load_dotenv
+
+load_dotenv()  # before main reads its env constants
+
+import groq_client  # noqa: E402
+import main  # noqa: E402
+import metrics  # noqa: E402
+
+logger = logging.getLogger("worker")
+
+
+def _finish(jobs, future):
+    """jobs: (job_id, claim token) pairs handled by future."""
+    db = main.SessionLocal()
+    try:
+        exc = future.exception()
+        for job_id, token in jobs:
+            if exc is None:
+                main.complete_job(db, job_id, token)
+            else:
+                logger.warning("job %s failed: %s", job_id, exc)
+                main.fail_job(db, job_id, token, repr(exc))
+    except Exception:
+        logger.exception("could not record result for jobs %s", [job_id for job_id, _ in jobs])
+    finally:
+        db.close()
+
+
+def run_worker(threads: int, batch_size: int, poll_interval: float, stop_event, settings: main.Settings):
+    """
+    Claim/process loop for one worker process with `threads` concurrent tasks.
+    With LLM batching enabled (LLM_BATCH_SIZE > 1) each task is a group of jobs
+    sent to Groq as one packed completion.
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    per_task = main.LLM_BATCH_SIZE if (main.USE_REAL_GROQ and main.LLM_BATCH_SIZE > 1) else 1
+    # no-op after fork; spawned children configure their own engine here
+    main.configure_database(settings)
+    # connections inherited from a forked parent must not be reused here
+    main.engine.dispose(close=False)
+    main.prewarm()
+    logger.info("worker %s started (%d threads)", worker_id, threads)
+
+    inflight = {}
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="job") as pool:
+        while not stop_event.is_set():
+            claimed = []
+            free = threads - len(inflight)
+            if free > 0:
+                db = main.SessionLocal()
+                try:
+                    claimed = main.claim_jobs(db, worker_id, min(free * per_task, max(batch_size, per_task)))
+                except Exception:
+                    logger.exception("claiming jobs failed")
+                finally:
+                    db.close()
+
+            for start in range(0, len(claimed), per_task):
+                chunk = claimed[start:start + per_task]
+                fut = pool.submit(main.process_interactions, [interaction_id for _, interaction_id, _ in chunk])
+                inflight[fut] = [(job_id, token) for job_id, _, token in chunk]
+
+            if not inflight:
+                stop_event.wait(poll_interval)
+                continue
+
+            # block only when saturated or idle; otherwise go straight back to claiming
+            timeout = poll_interval if (not claimed or len(inflight) >= threads) else 0
+            done, _ = wait(list(inflight), timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                _finish(inflight.pop(fut), fut)
+
+        # graceful shutdown: let running jobs finish so their leases are released
+        for fut in list(inflight):
+            _finish(inflight.pop(fut), fut)
+    logger.info("worker %s stopped", worker_id)
+
+
+def _serve_metrics(port: int):
+    if port:
+        metrics.start_http_server(port)
+        logger.info("metrics on :%d/metrics", port)
+
+
+def _child(threads, batch_size, poll_interval, stop_event, settings, metrics_port=0):
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    _serve_metrics(metrics_port)
+    run_worker(threads, batch_size, poll_interval, stop_event, settings)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Run interaction processing workers")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("WORKER_THREADS", "4")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("WORKER_BATCH_SIZE", "10")),
+                        help="max jobs claimed per round trip")
+    parser.add_argument("--poll-interval", type=float, default=float(os.getenv("WORKER_POLL_INTERVAL", "1.0")),
+                        help="seconds to sleep when the queue is empty")
+    parser.add_argument("--metrics-port", type=int, default=int(os.getenv("WORKER_METRICS_PORT", "0")),
+                        help="serve Prometheus metrics on this port (process n uses port + n); 0 = off")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    stop_event = multiprocessing.Event()
+
+    if not main.events_cross_processes():
+        logger.warning("PUBSUB_BACKEND is in-memory: status events from these workers do not reach the API "
+                       "processes; SSE clients only see results when the API re-reads the row "
+                       "(SSE_RECHECK_SECONDS). Use PostgreSQL (LISTEN/NOTIFY) when workers run separately.")
+    quota_processes = groq_client.get_client().quota_processes
+    if main.USE_REAL_GROQ and args.processes >= quota_processes:
+        logger.warning("GROQ_QUOTA_PROCESSES=%d but %d worker processes (plus the API) share GROQ_RPM / GROQ_TPM; "
+                       "each paces itself to 1/%d of the quota, so the total can exceed it",
+                       quota_processes, args.processes, quota_processes)
+
+    # checked once here rather than by every child process
+    settings = main.Settings.from_env()
+    main.configure_database(settings)
+    if not settings.skip_schema_check:
+        main.check_schema()
+
+    if args.processes <= 1:
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        _serve_metrics(args.metrics_port)
+        try:
+            run_worker(args.threads, args.batch_size, args.poll_interval, stop_event, settings)
+        except KeyboardInterrupt:
+            stop_event.set()
+        return
+
+    procs = [
+        multiprocessing.Process(
+            target=_child,
+            args=(args.threads, args.batch_size, args.poll_interval, stop_event, settings,
+                  args.metrics_port + n if args.metrics_port else 0),
+            name=f"worker-{n}",
+        )
+        for n in range(args.processes)
+    ]
+    for p in procs:
+        p.start()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for p in procs:
+            p.join()
+
+
+if __name__ == "__main__":
+    main_cli()